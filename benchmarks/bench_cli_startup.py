@@ -0,0 +1,67 @@
+# Startup cost of the headless entry point, from -X importtime.
+#
+#   python benchmarks/bench_cli_startup.py [--runs 5]
+#
+# Runs `main.py list` against an empty store and reports wall time, total
+# import time and the slowest imports, then the cost of the GUI-only
+# modules the CLI path is meant to skip.
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchutil import ROOT
+
+GUI_MODULES = ["tkinter", "PIL", "numpy"]
+
+
+def parse_importtime(stderr):
+    # {module: (self us, cumulative us)}
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        imports[name.strip()] = (int(self_us), int(cumulative_us))
+    return imports
+
+def run(argv, cwd):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=cwd,
+                            capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000, parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="theme-bench-cli-")
+    db = os.path.join(work_dir, "presets.db")
+    argv = [os.path.join(ROOT, "main.py"), "--db", db, "list"]
+
+    runs = [run(argv, work_dir) for _ in range(args.runs)]
+    walls = sorted(wall for wall, _ in runs)
+    imports = runs[len(runs) // 2][1]
+    total = sum(self_us for self_us, _ in imports.values()) / 1000
+    print(f"main.py list: wall {walls[0]:.1f} ms best, {walls[len(walls) // 2]:.1f} ms median; "
+          f"imports {total:.1f} ms over {len(imports)} modules")
+
+    print("slowest imports (cumulative ms):")
+    top_level = {name: cumulative for name, (_, cumulative) in imports.items() if "." not in name}
+    for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<24} {cumulative / 1000:8.2f}")
+
+    loaded = [name for name in GUI_MODULES if name in imports]
+    print("GUI modules imported by the CLI:", ", ".join(loaded) if loaded else "none")
+
+    _, gui_imports = run(["-c", "import tkinter, tkinter.ttk, PIL.Image, PIL.ImageTk, numpy"], work_dir)
+    avoided = sum(gui_imports[name][1] for name in GUI_MODULES if name in gui_imports) / 1000
+    print(f"import cost the CLI avoids (tkinter + Pillow + NumPy): {avoided:.1f} ms")
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
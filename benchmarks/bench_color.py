@@ -0,0 +1,73 @@
+# Color helpers in color.py vs the string versions they replaced
+# (tests/legacy_color.py), per call.
+#
+#   python benchmarks/bench_color.py [--colors 200] [--calls 100000]
+#
+# Calls cycle through --colors distinct values, so with the default most
+# calls hit the lru_cache the way gallery rebuilds and repeat applies do.
+# --colors above color.CACHE_SIZE shows the cost when the cache thrashes.
+import argparse
+import os
+import random
+import sys
+import timeit
+
+from benchutil import ROOT
+import color
+import theme
+
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+import legacy_color
+
+
+def make_inputs(count, seed=0):
+    rng = random.Random(seed)
+    hexes = [f"#{rng.getrandbits(24):06x}" for _ in range(count)]
+    optional = [[rng.choice(hexes) if rng.random() < 0.6 else "" for _ in range(5)] for _ in range(count)]
+    rgb_strings = [f"{rng.randrange(256)} {rng.randrange(256)} {rng.randrange(256)}" for _ in range(count)]
+    return hexes, optional, rgb_strings
+
+def cases(hexes, optional, rgb_strings):
+    # name: (argument tuples, new, legacy)
+    palettes = [theme.build_accent_palette(h, o) for h, o in zip(hexes, optional)]
+    return {
+        "hex_to_bgr": ([(h,) for h in hexes], color.hex_to_bgr, legacy_color.hex_to_bgr),
+        "reverse_hex": ([(h,) for h in hexes], color.reverse_hex, legacy_color.reverse_hex),
+        "hex_to_bgra_bytes": ([(h,) for h in hexes], color.hex_to_bgra_bytes, legacy_color.hex_to_bgra_bytes),
+        "darken_color": ([(h,) for h in hexes], color.darken_color, legacy_color.darken_color),
+        "build_accent_palette": (list(zip(hexes, optional)), theme.build_accent_palette,
+                                 legacy_color.build_accent_palette),
+        "palette_to_hex": ([(p,) for p in palettes], color.palette_to_hex, legacy_color.palette_to_hex),
+        "rgb_string_to_colorref": ([(s,) for s in rgb_strings], color.rgb_string_to_colorref,
+                                   legacy_color.rgb_string_to_colorref),
+    }
+
+def per_call_us(func, args, calls):
+    count = len(args)
+
+    def run():
+        for i in range(calls):
+            func(*args[i % count])
+
+    run()  # warm the caches
+    return min(timeit.repeat(run, number=1, repeat=5)) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--colors", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{args.colors} distinct colors, {args.calls} calls (best us per call)")
+    print(f"  {'helper':<24} {'legacy':>8} {'color.py':>9} {'speedup':>8}")
+    for name, (inputs, new, old) in cases(*make_inputs(args.colors)).items():
+        for call_args in inputs:
+            assert new(*call_args) == old(*call_args), name
+        old_us = per_call_us(old, inputs, args.calls)
+        new_us = per_call_us(new, inputs, args.calls)
+        print(f"  {name:<24} {old_us:8.3f} {new_us:9.3f} {old_us / new_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Gallery refresh time at 100 / 1 000 / 10 000 presets, virtualized
+# PresetGallery vs the old rebuild-every-button grid.
+#
+#   xvfb-run -a python benchmarks/bench_gallery.py [--sizes 100,1000,10000]
+#
+# Needs a display; without one (and without Xvfb) the benchmark is skipped.
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from benchutil import timed, make_wallpaper, has_display
+from color import darken_color
+
+
+def add_hover_effect(widget, base_color):
+    # Same bindings as main.add_hover_effect; main.py itself starts the app
+    darker = darken_color(base_color)
+    widget.bind("<Enter>", lambda e: widget.config(bg=darker))
+    widget.bind("<Leave>", lambda e: widget.config(bg=base_color))
+
+def make_store(path, count, wallpapers):
+    from preset_store import PresetStore
+
+    rng = random.Random(count)
+    color = lambda: f"#{rng.getrandbits(24):06x}"
+    store = PresetStore(path)
+    store.save_many([(f"preset-{i:05d}", {"accent_color": color(), "wallpaper": rng.choice(wallpapers),
+                                          "optional_colors": [color() for _ in range(5)]})
+                     for i in range(count)])
+    return store
+
+def bench_old_grid(root, names):
+    import tkinter as tk
+
+    frame = tk.Frame(root)
+    frame.pack()
+
+    def rebuild():
+        for widget in frame.winfo_children():
+            widget.destroy()
+        for i, name in enumerate(names):
+            btn = tk.Button(frame, text=name, width=20, height=2, bg="#e0e0e0", relief="flat")
+            btn.grid(row=i // 4, column=i % 4, padx=5, pady=5)
+            add_hover_effect(btn, "#e0e0e0")
+        root.update()
+
+    result = timed(rebuild, repeat=3)
+    frame.destroy()
+    return result
+
+def bench_gallery(root, store, thumbnail_dir):
+    from gallery import PresetGallery
+    from thumbnails import ThumbnailCache
+
+    thumbnails = ThumbnailCache(thumbnail_dir, size=(64, 40))
+    holder = {}
+
+    def build():
+        if "gallery" in holder:
+            holder["gallery"].frame.destroy()
+        holder["gallery"] = PresetGallery(root, store, thumbnails, on_select=lambda name: None,
+                                          decorate=add_hover_effect)
+        holder["gallery"].pack()
+        root.update()
+
+    results = {"build": timed(build, repeat=3)}
+    gallery = holder["gallery"]
+    rng = random.Random(0)
+
+    def scroll():
+        gallery.canvas.yview_moveto(rng.random())
+        gallery.render()
+        root.update()
+
+    results["scroll"] = timed(scroll, repeat=50)
+    counter = iter(range(10 ** 9))
+
+    def add_one():
+        name = f"new-{next(counter):06d}"
+        store.save(name, {"accent_color": "#336699", "wallpaper": "", "optional_colors": [""] * 5})
+        gallery.add(name)
+        root.update()
+
+    results["save one"] = timed(add_one, repeat=20)
+    results["widgets"] = (len(gallery.bound) + len(gallery.free), None)
+    gallery.frame.destroy()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--skip-old", action="store_true", help="Do not time the old rebuild-everything grid")
+    args = parser.parse_args()
+
+    if not has_display():
+        print("Skipped: no display. Run under xvfb-run on headless machines.")
+        return 0
+
+    import tkinter as tk
+
+    work_dir = tempfile.mkdtemp(prefix="theme-bench-gallery-")
+    root = tk.Tk()
+    try:
+        wallpapers = [make_wallpaper(os.path.join(work_dir, f"wall{i}.jpg"), (1920, 1080), seed=i) for i in range(8)]
+        print(f"{'presets':>8} {'variant':<9} {'step':<9} {'best ms':>10} {'median ms':>10}")
+        for count in (int(size) for size in args.sizes.split(",")):
+            store = make_store(os.path.join(work_dir, f"presets{count}.db"), count, wallpapers)
+            for step, (best, median) in bench_gallery(root, store, os.path.join(work_dir, "thumbs")).items():
+                if step == "widgets":
+                    print(f"{count:>8} {'gallery':<9} {'tiles':<9} {best:>10}")
+                else:
+                    print(f"{count:>8} {'gallery':<9} {step:<9} {best:10.2f} {median:10.2f}")
+            if not args.skip_old:
+                best, median = bench_old_grid(root, store.names())
+                print(f"{count:>8} {'old grid':<9} {'rebuild':<9} {best:10.2f} {median:10.2f}")
+            store.close()
+    finally:
+        root.destroy()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
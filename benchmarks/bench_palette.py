@@ -0,0 +1,46 @@
+# Wallpaper palette extraction on an 8K JPEG.
+#
+#   python benchmarks/bench_palette.py [--size 7680x4320] [--repeat 5]
+#
+#   cold   extract_palette(path): draft decode straight from the JPEG
+#   warm   extract_palette(path, thumbnails=cache) after the preview was
+#          built, which is how the app calls it
+# The 100 ms target applies to "warm" only.
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchutil import timed, make_wallpaper
+from palette import extract_palette
+from thumbnails import ThumbnailCache
+from wallpaper_cache import parse_resolution
+
+
+TARGET_MS = 100
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="7680x4320")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="theme-bench-palette-")
+    try:
+        path = make_wallpaper(os.path.join(work_dir, "wall.jpg"), parse_resolution(args.size))
+        cold = timed(lambda: extract_palette(path), args.repeat)
+        cache = ThumbnailCache(os.path.join(work_dir, "thumbs"))
+        cache.get_image(path)
+        warm = timed(lambda: extract_palette(path, thumbnails=cache), args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.size} JPEG (best / median ms)")
+    for name, (best, median) in (("cold", cold), ("warm", warm)):
+        print(f"  {name:<6} {best:10.1f} {median:10.1f}")
+    print(f"warm {'meets' if warm[0] < TARGET_MS else 'misses'} the {TARGET_MS} ms target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# PresetStore at scale vs the old one-JSON-file-per-preset layout.
+#
+#   python benchmarks/bench_preset_store.py [--count 10000]
+#
+# "refresh" is what update_preset_viewer used to do on every save: list the
+# directory and read every preset file.
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from benchutil import timed
+from preset_store import PresetStore
+
+
+def make_presets(count, seed=0):
+    rng = random.Random(seed)
+    color = lambda: f"#{rng.getrandbits(24):06x}"
+    return [(f"preset-{i:05d}", {"accent_color": color(), "wallpaper": f"C:\\Wallpapers\\{i % 50}.jpg",
+                                 "optional_colors": [color() if rng.random() < 0.6 else "" for _ in range(5)]})
+            for i in range(count)]
+
+def json_dir_results(directory, presets):
+    for name, preset in presets:
+        with open(os.path.join(directory, name + ".json"), "w") as file:
+            json.dump(preset, file)
+    names = [name for name, _ in presets]
+
+    def list_presets():
+        return [f for f in os.listdir(directory) if f.endswith(".json")]
+
+    def refresh():
+        for filename in list_presets():
+            with open(os.path.join(directory, filename)) as file:
+                json.load(file)
+
+    def load_random():
+        with open(os.path.join(directory, random.choice(names) + ".json")) as file:
+            json.load(file)
+
+    return {
+        "list": timed(list_presets),
+        "refresh": timed(refresh, repeat=3),
+        "load one": timed(load_random, repeat=200),
+    }
+
+def store_results(path, presets, json_dir):
+    store = PresetStore(path)
+    results = {"bulk insert": timed(lambda: store.save_many(presets), repeat=1)}
+    store.close()
+    names = [name for name, _ in presets]
+
+    results["reopen"] = timed(lambda: PresetStore(path).close(), repeat=5)
+    store = PresetStore(path)
+    results["list"] = timed(store.names)
+    results["count"] = timed(lambda: len(store))
+    results["load one"] = timed(lambda: store.get(random.choice(names)), repeat=200)
+    results["save one"] = timed(lambda: store.save("new preset", presets[0][1]), repeat=20)
+    store.close()
+
+    migrated_path = path + ".migrated"
+    migrated = PresetStore(migrated_path)
+    results["migrate json dir"] = timed(lambda: migrated.migrate_json_dir(json_dir), repeat=1)
+    assert len(migrated) == len(presets)
+    migrated.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="theme-bench-store-")
+    try:
+        presets = make_presets(args.count)
+        json_dir = os.path.join(work_dir, "json")
+        os.makedirs(json_dir)
+        old = json_dir_results(json_dir, presets)
+        new = store_results(os.path.join(work_dir, "presets.db"), presets, json_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.count} presets (best / median ms)")
+    print("one JSON file per preset:")
+    for name, (best, median) in old.items():
+        print(f"  {name:<18} {best:10.3f} {median:10.3f}")
+    print("PresetStore (SQLite):")
+    for name, (best, median) in new.items():
+        print(f"  {name:<18} {best:10.3f} {median:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
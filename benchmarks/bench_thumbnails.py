@@ -0,0 +1,107 @@
+# Cold vs warm wallpaper preview latency and peak RSS.
+#
+#   python benchmarks/bench_thumbnails.py [--count 3] [--size 7680x4320]
+#
+# Each scenario runs in its own process so its peak RSS is not inflated by
+# the others:
+#   old_preview  the previous preview code: Image.open + thumbnail((300, 200)),
+#                which current Pillow already decodes via draft()
+#   full_decode  reference: load the full image, then thumbnail
+#   cold         ThumbnailCache with an empty cache directory
+#   warm_disk    a new ThumbnailCache over a populated directory (restart)
+#   warm_memory  get_photo on an already loaded PhotoImage (needs a display)
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchutil import timed, peak_rss_mb, make_wallpaper, has_display
+
+SCENARIOS = ["old_preview", "full_decode", "cold", "warm_disk", "warm_memory"]
+
+
+def run_scenario(name, images, cache_dir):
+    from PIL import Image
+    from thumbnails import ThumbnailCache, THUMBNAIL_SIZE
+
+    os.makedirs(cache_dir, exist_ok=True)
+    baseline = peak_rss_mb()
+    latencies = []
+    if name in ("old_preview", "full_decode"):
+        def preview(path):
+            with Image.open(path) as img:
+                if name == "full_decode":
+                    img.load()
+                img.thumbnail(THUMBNAIL_SIZE)
+        for path in images:
+            latencies.append(timed(lambda: preview(path), repeat=1)[0])
+    elif name == "cold":
+        for path in images:
+            cache = ThumbnailCache(tempfile.mkdtemp(dir=cache_dir))
+            latencies.append(timed(lambda: cache.get_image(path), repeat=1)[0])
+    elif name == "warm_disk":
+        populated = os.path.join(cache_dir, "populated")
+        ThumbnailCache(populated).get_image(images[0])  # make sure every entry exists
+        for path in images:
+            ThumbnailCache(populated).get_image(path)
+        for path in images:
+            latencies.append(timed(lambda: ThumbnailCache(populated).get_image(path))[0])
+    elif name == "warm_memory":
+        if not has_display():
+            return None
+        import tkinter as tk
+
+        root = tk.Tk()
+        cache = ThumbnailCache(os.path.join(cache_dir, "populated"))
+        for path in images:
+            cache.get_photo(path)
+            latencies.append(timed(lambda: cache.get_photo(path))[0])
+        root.destroy()
+    peak = peak_rss_mb()
+    return {
+        "mean_ms": sum(latencies) / len(latencies),
+        "max_ms": max(latencies),
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - baseline if peak is not None and baseline is not None else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=3, help="Number of synthetic wallpapers")
+    parser.add_argument("--size", default="7680x4320")
+    parser.add_argument("--work-dir", help="Reuse generated images from this directory")
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or os.path.join(tempfile.gettempdir(), "theme-bench-thumbnails")
+    os.makedirs(work_dir, exist_ok=True)
+    width, height = (int(part) for part in args.size.lower().split("x"))
+    images = [os.path.join(work_dir, f"wallpaper_{width}x{height}_{i}.jpg") for i in range(args.count)]
+
+    if args.scenario:
+        result = run_scenario(args.scenario, images, os.path.join(work_dir, "cache"))
+        print(json.dumps(result))
+        return
+
+    for i, path in enumerate(images):
+        make_wallpaper(path, (width, height), seed=i)
+    sizes = [os.path.getsize(path) / (1024 * 1024) for path in images]
+    print(f"{len(images)} wallpapers, {width}x{height}, {min(sizes):.0f}-{max(sizes):.0f} MB")
+    print(f"{'scenario':<12} {'mean ms':>9} {'max ms':>9} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+    for name in SCENARIOS:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--scenario", name,
+                                 "--count", str(args.count), "--size", args.size, "--work-dir", work_dir],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if result is None:
+            print(f"{name:<12} skipped (no display)")
+            continue
+        growth = result["rss_growth_mb"]
+        print(f"{name:<12} {result['mean_ms']:9.1f} {result['max_ms']:9.1f} {result['peak_rss_mb'] or 0:12.0f} "
+              f"{growth if growth is not None else 0:14.0f}")
+
+
+if __name__ == "__main__":
+    main()
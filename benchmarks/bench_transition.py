@@ -0,0 +1,78 @@
+# Accent fade: frame generation cost and write cadence against the fake
+# registry backend.
+#
+#   python benchmarks/bench_transition.py [--duration 0.5]
+#
+# "frames" times frames_for (registry read + OKLab interpolation) per step
+# count. "cadence" plays a fade of `duration` seconds at each frame rate with
+# the real clock and sleep, recording the time between consecutive
+# ColorizationColor writes; jitter is their deviation from 1/fps.
+import argparse
+import statistics
+import time
+
+from benchutil import timed
+from refresh import StubWin32Calls
+from registry import FakeRegistryBackend, HKEY_CURRENT_USER, ACCENT_KEY, REG_DWORD, REG_BINARY
+from transition import TransitionPlayer, DWORD_VALUES, frames_for
+
+
+START_PALETTE = bytes([0x10, 0x20, 0x30, 0xAA]) * 8
+END_PALETTE = bytes([0xF0, 0x60, 0x20, 0xAA]) * 8
+TARGET = 0xF06020
+
+
+class TimingBackend(FakeRegistryBackend):
+    # Timestamps each ColorizationColor write
+    def __init__(self, values):
+        super().__init__(values)
+        self.stamps = []
+
+    def set_value(self, handle, name, value_type, value):
+        if name == "ColorizationColor":
+            self.stamps.append(time.perf_counter())
+        super().set_value(handle, name, value_type, value)
+
+
+def make_values():
+    values = {(HKEY_CURRENT_USER, path, name): (0x102030, REG_DWORD) for path, name in DWORD_VALUES}
+    values[(HKEY_CURRENT_USER, ACCENT_KEY, "AccentPalette")] = (START_PALETTE, REG_BINARY)
+    return values
+
+def frame_results(step_counts):
+    backend = FakeRegistryBackend(make_values())
+    return {steps: timed(lambda: frames_for(TARGET, END_PALETTE, steps, backend), repeat=50)
+            for steps in step_counts}
+
+def cadence_result(fps, duration):
+    backend = TimingBackend(make_values())
+    dwords, palettes = frames_for(TARGET, END_PALETTE, max(2, round(fps * duration)), backend)
+    backend.reset_counters()
+    report = TransitionPlayer(backend, StubWin32Calls(), fps=fps).play(dwords, palettes)
+    gaps = [(b - a) * 1000 for a, b in zip(backend.stamps, backend.stamps[1:])]
+    jitter = [abs(gap - 1000 / fps) for gap in gaps]
+    report["jitter_mean"] = statistics.mean(jitter) if jitter else 0.0
+    report["jitter_max"] = max(jitter) if jitter else 0.0
+    report["registry_writes"] = backend.writes
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print("frame generation (best / median ms)")
+    for steps, (best, median) in frame_results([8, 15, 30, 60, 120]).items():
+        print(f"  {steps:>4} steps {best:10.3f} {median:10.3f}")
+
+    print(f"cadence, {args.duration:.2f} s fade")
+    print(f"  {'fps':>4} {'frames':>7} {'dropped':>8} {'writes':>7} {'achieved':>9} {'jitter ms':>10} {'max ms':>8}")
+    for fps in (30, 60, 120):
+        r = cadence_result(fps, args.duration)
+        print(f"  {fps:>4} {r['frames']:>7} {r['dropped']:>8} {r['registry_writes']:>7} "
+              f"{r['fps']:>9.1f} {r['jitter_mean']:>10.3f} {r['jitter_max']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Shared helpers for the benchmark scripts. Run the scripts from anywhere:
+#   python benchmarks/bench_thumbnails.py
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def timed(func, repeat=5):
+    # Returns (best, median) in milliseconds
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[0], samples[len(samples) // 2]
+
+def peak_rss_mb():
+    # Peak resident set size of this process so far, or None if unknown.
+    # VmHWM first: ru_maxrss survives exec on Linux, so a child started by a
+    # large parent would report the parent's peak.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return _peak_working_set_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _peak_working_set_mb():
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = Counters()
+    counters.cb = ctypes.sizeof(Counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize / (1024 * 1024)
+
+def make_wallpaper(path, size=(7680, 4320), seed=0, quality=95):
+    # Gradient plus noise: compresses like a detailed photo, so an 8K JPEG
+    # lands in the tens of megabytes
+    import numpy as np
+    from PIL import Image
+
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], axis=-1)
+    noise = rng.normal(0, 40, base.shape).astype(np.float32)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    save_options = {"quality": quality} if path.lower().endswith((".jpg", ".jpeg")) else {}
+    Image.fromarray(pixels).save(path, **save_options)
+    return path
+
+def has_display():
+    if sys.platform == "win32" or os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"):
+        try:
+            import tkinter
+            tkinter.Tk().destroy()
+            return True
+        except Exception:
+            return False
+    return False
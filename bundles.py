@@ -0,0 +1,121 @@
+# Preset bundles: one zip with a manifest and every referenced wallpaper
+# stored once under its SHA-256. Both directions stream file contents in
+# chunks, so memory use does not depend on bundle size.
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+
+from wallpaper_cache import file_hash, HASH_CHUNK
+
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+# Already-compressed images gain nothing from deflate
+DEFLATE_EXTENSIONS = {".bmp", ".tif", ".tiff"}
+
+
+class BundleError(ValueError):
+    pass
+
+
+def export_bundle(store, path, names=None):
+    # Written next to path and moved into place at the end, so a failed
+    # export leaves neither a partial zip nor a clobbered older bundle
+    names = names or store.names()
+    presets = {}
+    blobs = {}
+    hashes = {}
+
+    tmp_path = os.fspath(path) + ".part"
+    try:
+        with zipfile.ZipFile(tmp_path, "w", allowZip64=True) as bundle:
+            for name in names:
+                preset = store.get(name)
+                if preset is None:
+                    raise KeyError(f"Preset not found: {name}")
+                preset = dict(preset)
+                wallpaper = preset.get("wallpaper") or ""
+                if wallpaper:
+                    if wallpaper not in hashes:
+                        hashes[wallpaper] = file_hash(wallpaper)
+                    digest = hashes[wallpaper]
+                    if digest not in blobs:
+                        blobs[digest] = _write_blob(bundle, digest, wallpaper)
+                    preset["wallpaper"] = digest
+                presets[name] = preset
+
+            manifest = {"format": BUNDLE_FORMAT, "presets": presets, "blobs": blobs}
+            bundle.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(presets), len(blobs)
+
+def _write_blob(bundle, digest, source):
+    extension = os.path.splitext(source)[1].lower()
+    info = zipfile.ZipInfo(f"blobs/{digest}{extension}")
+    info.compress_type = zipfile.ZIP_DEFLATED if extension in DEFLATE_EXTENSIONS else zipfile.ZIP_STORED
+    size = os.path.getsize(source)
+    with open(source, "rb") as src, bundle.open(info, "w", force_zip64=size > 0x7FFFFFFF) as dst:
+        shutil.copyfileobj(src, dst, HASH_CHUNK)
+    return {"name": info.filename, "size": size}
+
+
+def read_manifest(bundle):
+    try:
+        manifest = json.loads(bundle.read(MANIFEST_NAME))
+    except KeyError:
+        raise BundleError("Bundle has no manifest.")
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"Unsupported bundle format: {manifest.get('format')}")
+    return manifest
+
+def import_bundle(store, path, wallpaper_dir, overwrite=True):
+    # Extracts wallpapers into wallpaper_dir, verifying each checksum, then
+    # saves the presets with their paths rewritten in one transaction. The
+    # stored paths are absolute, since SystemParametersInfo does not resolve
+    # relative ones against the app's working directory.
+    wallpaper_dir = os.path.abspath(wallpaper_dir)
+    with zipfile.ZipFile(path, "r") as bundle:
+        manifest = read_manifest(bundle)
+        os.makedirs(wallpaper_dir, exist_ok=True)
+
+        extracted = {}
+        for digest, blob in manifest["blobs"].items():
+            target = os.path.join(wallpaper_dir, os.path.basename(blob["name"]))
+            if not os.path.exists(target) or file_hash(target) != digest:
+                _extract_blob(bundle, blob["name"], digest, target)
+            extracted[digest] = target
+
+        items = []
+        for name, preset in manifest["presets"].items():
+            if not overwrite and store.get(name) is not None:
+                continue
+            preset = dict(preset)
+            if preset.get("wallpaper"):
+                if preset["wallpaper"] not in extracted:
+                    raise BundleError(f"Preset {name} references a missing wallpaper.")
+                preset["wallpaper"] = extracted[preset["wallpaper"]]
+            items.append((name, preset))
+
+    store.save_many(items)
+    return len(items), len(extracted)
+
+def _extract_blob(bundle, member, digest, target):
+    tmp_path = target + ".part"
+    hasher = hashlib.sha256()
+    try:
+        with bundle.open(member) as src, open(tmp_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(HASH_CHUNK), b""):
+                hasher.update(chunk)
+                dst.write(chunk)
+        if hasher.hexdigest() != digest:
+            raise BundleError(f"Checksum mismatch for {member}")
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,237 @@
+# Command line entry point for login scripts and scheduled tasks. Only the
+# core modules are imported here - never Tk, ttk or Pillow.
+import argparse
+import datetime
+import json
+import os
+import sys
+import zipfile
+
+from preset_store import open_store
+from refresh import format_report
+import fingerprint
+import snapshot
+import theme
+
+
+def ensure_streams():
+    # The windowed build (main.exe) starts without stdout/stderr. Attach to
+    # the console of whatever started it, or discard output when there is
+    # none (a scheduled task), so print and json.dump never hit None.
+    if sys.stdout is not None and sys.stderr is not None:
+        return
+    if os.name == "nt":
+        import ctypes
+
+        if ctypes.windll.kernel32.AttachConsole(-1):  # ATTACH_PARENT_PROCESS
+            sys.stdout = sys.stdout or open("CONOUT$", "w")
+            sys.stderr = sys.stderr or open("CONOUT$", "w")
+            return
+    sys.stdout = sys.stdout or open(os.devnull, "w")
+    sys.stderr = sys.stderr or open(os.devnull, "w")
+
+def print_diff(changes):
+    for (path, name), (current, target) in changes.items():
+        print(f"{path}\\{name}: {snapshot.format_entry(current)} -> {snapshot.format_entry(target)}")
+    return len(changes)
+
+
+# --- Commands ---
+
+def cmd_list(store, args):
+    for name in store.names():
+        print(name)
+    return 0
+
+def cmd_apply(store, args):
+    # The registry is read once to confirm the recorded fingerprint still holds
+    report = fingerprint.apply_preset_if_changed(store, args.preset, current=snapshot.take_snapshot(),
+                                                 force=args.force, transition_steps=args.transition,
+                                                 transition_fps=args.fps, snapshot_path=args.save_snapshot)
+    if report is None:
+        print(f"Preset {args.preset} is already applied")
+        return 0
+    print(f"Applied preset: {args.preset}")
+    if report:
+        print("Refreshed:", format_report(report))
+    return 0
+
+def cmd_apply_hives(store, args):
+    # Exit status 1 when any target failed
+    from hives import UserHive, OfflineHive, apply_to_hives, format_results
+
+    targets = [UserHive(sid) for sid in args.sid] + [OfflineHive(path) for path in args.hive]
+    if not targets:
+        raise ValueError("Give at least one --sid or --hive target.")
+    accent_color, optional_colors, wallpaper = theme.validate_preset(theme.load_preset(store, args.preset))
+    results = apply_to_hives(accent_color, optional_colors, wallpaper, targets, max_workers=args.jobs)
+    print(format_results(results))
+    return 0 if all(result.ok for result in results) else 1
+
+def cmd_export(store, args):
+    presets = {name: theme.load_preset(store, name) for name in (args.presets or store.names())}
+    data = presets[args.presets[0]] if args.presets and len(args.presets) == 1 else presets
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(data, file, indent=4)
+    else:
+        json.dump(data, sys.stdout, indent=4)
+        print()
+    return 0
+
+def cmd_diff(store, args):
+    # Exit status 1 when applying the preset would change something
+    target = snapshot.preset_snapshot(*theme.validate_preset(theme.load_preset(store, args.preset)))
+    if not print_diff(snapshot.diff(snapshot.take_snapshot(), target)):
+        print(f"Preset {args.preset} matches the current theme")
+        return 0
+    return 1
+
+def cmd_snapshot(store, args):
+    snapshot.save(snapshot.take_snapshot(), args.file)
+    print(f"Saved snapshot: {args.file}")
+    return 0
+
+def cmd_snapshot_diff(store, args):
+    # Compares two snapshots, or one snapshot against the current theme
+    before = snapshot.load(args.before)
+    after = snapshot.load(args.after) if args.after else snapshot.take_snapshot()
+    if not print_diff(snapshot.diff(before, after)):
+        print("No differences")
+        return 0
+    return 1
+
+def cmd_rollback(store, args):
+    report = theme.restore_snapshot(snapshot.load(args.file))
+    fingerprint.clear_applied(store)
+    print(f"Restored snapshot: {args.file}")
+    if report:
+        print("Refreshed:", format_report(report))
+    return 0
+
+def cmd_schedule(store, args):
+    # Long-running: applies presets from a schedule file until interrupted
+    from scheduler import Scheduler, load_config, parse_rules
+
+    config = load_config(args.config)
+    apply = lambda name: fingerprint.apply_preset_if_changed(store, name, current=snapshot.take_snapshot())
+    sched = Scheduler(parse_rules(config), apply,
+                      latitude=config.get("latitude"), longitude=config.get("longitude"))
+    if args.dry_run:
+        for when, index in sorted(sched.upcoming()):
+            print(f"{datetime.datetime.fromtimestamp(when):%Y-%m-%d %H:%M}  {sched.rules[index].preset}")
+        return 0
+    try:
+        sched.run(catch_up=not args.no_catch_up)
+    except KeyboardInterrupt:
+        sched.stop()
+    return 0
+
+def cmd_bundle_export(store, args):
+    from bundles import export_bundle
+
+    presets, wallpapers = export_bundle(store, args.file, args.presets)
+    print(f"Exported {presets} presets and {wallpapers} wallpapers to {args.file}")
+    return 0
+
+def cmd_bundle_import(store, args):
+    from bundles import import_bundle
+
+    wallpaper_dir = args.wallpaper_dir or os.path.join(os.path.dirname(os.path.abspath(store.path)), "wallpapers")
+    presets, wallpapers = import_bundle(store, args.file, wallpaper_dir, overwrite=not args.keep_existing)
+    print(f"Imported {presets} presets and {wallpapers} wallpapers into {wallpaper_dir}")
+    return 0
+
+def cmd_trace_report(store, args):
+    import tracing
+
+    print(tracing.format_summary(tracing.summarize(args.files)))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="theme-switcher", description="Apply and inspect theme presets.")
+    parser.add_argument("--db", help="Preset store path (default: presets.db or $THEME_PRESET_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List saved presets").set_defaults(func=cmd_list)
+
+    apply_parser = commands.add_parser("apply", help="Apply a preset")
+    apply_parser.add_argument("preset")
+    apply_parser.add_argument("--transition", type=int, default=0, metavar="STEPS",
+                              help="Fade the accent over this many frames (needs NumPy)")
+    apply_parser.add_argument("--fps", type=int, default=30, help="Transition frame rate")
+    apply_parser.add_argument("--save-snapshot", metavar="FILE", help="Save the current theme before applying")
+    apply_parser.add_argument("--force", action="store_true", help="Apply even if the preset is already active")
+    apply_parser.set_defaults(func=cmd_apply)
+
+    hives_parser = commands.add_parser("apply-hives", help="Apply a preset to other user profiles")
+    hives_parser.add_argument("preset")
+    hives_parser.add_argument("--sid", action="append", default=[], help="Loaded profile under HKEY_USERS")
+    hives_parser.add_argument("--hive", action="append", default=[], metavar="NTUSER.DAT",
+                              help="Offline profile hive file")
+    hives_parser.add_argument("-j", "--jobs", type=int, default=4, help="Targets applied at once (default: 4)")
+    hives_parser.set_defaults(func=cmd_apply_hives)
+
+    export_parser = commands.add_parser("export", help="Export presets as JSON")
+    export_parser.add_argument("presets", nargs="*", help="Preset names (default: all)")
+    export_parser.add_argument("-o", "--output", help="Write to a file instead of stdout")
+    export_parser.set_defaults(func=cmd_export)
+
+    diff_parser = commands.add_parser("diff", help="Show registry values a preset would change")
+    diff_parser.add_argument("preset")
+    diff_parser.set_defaults(func=cmd_diff)
+
+    snapshot_parser = commands.add_parser("snapshot", help="Save the current theme to a snapshot file")
+    snapshot_parser.add_argument("file")
+    snapshot_parser.set_defaults(func=cmd_snapshot)
+
+    snapshot_diff_parser = commands.add_parser("snapshot-diff", help="Compare snapshots")
+    snapshot_diff_parser.add_argument("before")
+    snapshot_diff_parser.add_argument("after", nargs="?", help="Second snapshot (default: current theme)")
+    snapshot_diff_parser.set_defaults(func=cmd_snapshot_diff)
+
+    rollback_parser = commands.add_parser("rollback", help="Restore a snapshot, writing only what differs")
+    rollback_parser.add_argument("file")
+    rollback_parser.set_defaults(func=cmd_rollback)
+
+    schedule_parser = commands.add_parser("schedule", help="Apply presets on a time-of-day schedule")
+    schedule_parser.add_argument("config", help="JSON file with latitude, longitude and rules")
+    schedule_parser.add_argument("--dry-run", action="store_true", help="Print the next switch times and exit")
+    schedule_parser.add_argument("--no-catch-up", action="store_true",
+                                 help="Do not apply the current preset on start")
+    schedule_parser.set_defaults(func=cmd_schedule)
+
+    bundle_export_parser = commands.add_parser("bundle-export", help="Export presets and wallpapers to a bundle")
+    bundle_export_parser.add_argument("file")
+    bundle_export_parser.add_argument("presets", nargs="*", help="Preset names (default: all)")
+    bundle_export_parser.set_defaults(func=cmd_bundle_export)
+
+    bundle_import_parser = commands.add_parser("bundle-import", help="Import presets and wallpapers from a bundle")
+    bundle_import_parser.add_argument("file")
+    bundle_import_parser.add_argument("--wallpaper-dir", help="Where to extract wallpapers "
+                                                              "(default: wallpapers next to the preset store)")
+    bundle_import_parser.add_argument("--keep-existing", action="store_true",
+                                      help="Do not overwrite presets that already exist")
+    bundle_import_parser.set_defaults(func=cmd_bundle_import)
+
+    report_parser = commands.add_parser("trace-report", help="Summarize apply latency from THEME_TRACE files")
+    report_parser.add_argument("files", nargs="+")
+    report_parser.set_defaults(func=cmd_trace_report)
+    return parser
+
+def main(argv=None):
+    ensure_streams()
+    args = build_parser().parse_args(argv)
+    store = open_store(args.db)
+    try:
+        return args.func(store, args)
+    except (KeyError, ValueError, OSError, zipfile.BadZipFile) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
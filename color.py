@@ -0,0 +1,130 @@
+from functools import lru_cache
+
+
+CACHE_SIZE = 1024
+PALETTE_ALPHA = 0xAA
+HOVER_FACTOR = 0.85
+
+
+class Color:
+    # An sRGB color packed into one int (0xRRGGBB). Instances are immutable
+    # and come from the cached constructors below, so each distinct string is
+    # parsed once per session.
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value & 0xFFFFFF
+
+    def __eq__(self, other):
+        return isinstance(other, Color) and other.value == self.value
+
+    def __hash__(self):
+        return self.value
+
+    def __repr__(self):
+        return f"Color({self.hex})"
+
+    @property
+    def r(self):
+        return self.value >> 16
+
+    @property
+    def g(self):
+        return (self.value >> 8) & 0xFF
+
+    @property
+    def b(self):
+        return self.value & 0xFF
+
+    @property
+    def hex(self):
+        return f"#{self.value:06x}"
+
+    @property
+    def bgr(self):
+        # Byte-swapped DWORD, as hex_to_bgr has always produced
+        return (self.b << 16) | (self.g << 8) | self.r
+
+    @property
+    def rgb_string(self):
+        # Control Panel\Colors format
+        return f"{self.r} {self.g} {self.b}"
+
+    def swapped(self):
+        return Color(self.bgr)
+
+    def bgra_bytes(self, alpha=PALETTE_ALPHA):
+        return bytes([self.b, self.g, self.r, alpha])
+
+    def darken(self, factor=HOVER_FACTOR):
+        return Color((int(self.r * factor) << 16) | (int(self.g * factor) << 8) | int(self.b * factor))
+
+
+# --- Cached Constructors ---
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_hex(hex_color):
+    return Color(int(hex_color.lstrip("#"), 16))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_rgb_string(rgb_string):
+    r, g, b = (int(part) for part in rgb_string.split())
+    return Color((r << 16) | (g << 8) | b)
+
+def from_dword(value):
+    # Accent DWORDs as written by set_accent_color are 0x00RRGGBB; Windows
+    # may set the top byte
+    return Color(value)
+
+
+# --- Cached Conversions ---
+# Drop-in replacements for the string helpers theme.py used to define, with
+# the same outputs for every input they accepted.
+
+@lru_cache(maxsize=CACHE_SIZE)
+def hex_to_bgr(hex_color):
+    return parse_hex(hex_color).bgr
+
+@lru_cache(maxsize=CACHE_SIZE)
+def reverse_hex(hex_color):
+    # String slicing keeps the caller's letter case, as before
+    hex_color = hex_color.lstrip("#")
+    return f"#{hex_color[4:6]}{hex_color[2:4]}{hex_color[0:2]}"
+
+@lru_cache(maxsize=CACHE_SIZE)
+def hex_to_bgra_bytes(hex_color):
+    return parse_hex(hex_color).bgra_bytes()
+
+@lru_cache(maxsize=CACHE_SIZE)
+def darken_color(hex_color, factor=HOVER_FACTOR):
+    return parse_hex(hex_color).darken(factor).hex
+
+@lru_cache(maxsize=CACHE_SIZE)
+def palette_entry(hex_color):
+    # One AccentPalette entry: R, G, B, alpha. Empty means unset.
+    if not hex_color:
+        return bytes([0, 0, 0, PALETTE_ALPHA])
+    color = parse_hex(hex_color)
+    return bytes([color.r, color.g, color.b, PALETTE_ALPHA])
+
+def rgb_string(hex_color):
+    return parse_hex(hex_color).rgb_string
+
+def rgb_string_to_hex(rgb_string):
+    return parse_rgb_string(rgb_string).hex
+
+def rgb_string_to_colorref(rgb_string):
+    # COLORREF is 0x00BBGGRR
+    return parse_rgb_string(rgb_string).bgr
+
+def dword_to_hex(value):
+    return from_dword(value).hex
+
+def palette_to_hex(blob):
+    # Inverse of build_accent_palette: one hex per 4-byte entry, "" for the
+    # black placeholder written for unset colors
+    colors = []
+    for i in range(0, len(blob) - 3, 4):
+        value = (blob[i] << 16) | (blob[i + 1] << 8) | blob[i + 2]
+        colors.append(Color(value).hex if value else "")
+    return colors
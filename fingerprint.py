@@ -0,0 +1,134 @@
+# Fingerprints of what an apply leaves behind, one digest per component
+# (accent values, AccentPalette, wallpaper content). The last applied
+# fingerprint is kept in the preset store, so an apply that would change
+# nothing is skipped without touching the registry, and a partial match
+# only re-applies the components that differ.
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from registry import REG_BINARY
+from snapshot import WALLPAPER_VALUE
+from theme import APPLY_COMPONENTS, apply_theme, preset_values, validate_preset, load_preset, wallpaper_cache
+
+
+META_KEY = "applied_fingerprint"
+
+
+# --- Digests ---
+
+def component_of(key):
+    return "palette" if key[1] == "AccentPalette" else "accent"
+
+def values_digest(values):
+    # Stable across runs: sorted keys, binary values as hex
+    digest = hashlib.sha256()
+    for (path, name), entry in sorted(values.items()):
+        value, value_type = entry if entry is not None else (None, None)
+        if value_type == REG_BINARY:
+            value = bytes(value).hex()
+        digest.update(repr((path.lower(), name, value_type, value)).encode("utf-8"))
+    return digest.hexdigest()
+
+def registry_digests(values):
+    grouped = {"accent": {}, "palette": {}}
+    for key, entry in values.items():
+        grouped[component_of(key)][key] = entry
+    return {component: values_digest(entries) for component, entries in grouped.items()}
+
+@lru_cache(maxsize=256)
+def color_digests(accent_color, optional_colors):
+    return registry_digests(preset_values(accent_color, list(optional_colors)))
+
+@lru_cache(maxsize=1)
+def preset_keys():
+    # Every preset writes the same set of values
+    return tuple(preset_values("#000000", [""] * 5))
+
+def fingerprint(accent_color, optional_colors, wallpaper):
+    # Components an apply would not touch are None. The wallpaper hash comes
+    # from the cache's path/mtime/size index, so repeat calls only stat.
+    result = dict.fromkeys(APPLY_COMPONENTS)
+    if accent_color:
+        result.update(color_digests(accent_color.lower(), tuple(color.lower() for color in optional_colors)))
+    if wallpaper:
+        try:
+            result["wallpaper"] = wallpaper_cache().source_hash(wallpaper)
+        except OSError:
+            result["wallpaper"] = ""  # never matches, so the apply reports the error
+    return result
+
+def changed_components(applied, target):
+    return [component for component in APPLY_COMPONENTS
+            if target.get(component) is not None and applied.get(component) != target[component]]
+
+
+# --- Persistence ---
+
+def load_applied(store):
+    try:
+        return json.loads(store.get_meta(META_KEY) or "{}")
+    except ValueError:
+        return {}
+
+def save_applied(store, applied):
+    store.set_meta(META_KEY, json.dumps(applied, sort_keys=True))
+
+def clear_applied(store):
+    save_applied(store, {})
+
+def verify_applied(store, current, applied=None):
+    # Drops components that no longer match the registry, e.g. after the
+    # theme was changed in Settings. current is a snapshot.take_snapshot().
+    applied = load_applied(store) if applied is None else applied
+    observed = registry_digests({key: current.get(key) for key in preset_keys()})
+    stale = [component for component in ("accent", "palette") if applied.get(component) != observed[component]]
+
+    wallpaper = current.get(WALLPAPER_VALUE)
+    recorded = applied.get("wallpaper_path")
+    if not wallpaper or not recorded or os.path.normcase(wallpaper[0]) != os.path.normcase(recorded):
+        stale.append("wallpaper")
+
+    stale = [component for component in stale if component in applied]
+    if stale:
+        for component in stale:
+            del applied[component]
+        save_applied(store, applied)
+    return applied
+
+
+# --- Apply ---
+
+def apply_if_changed(store, accent_color, optional_colors, wallpaper, batch=None, current=None, force=False,
+                     **options):
+    # Returns None when nothing would change, else the refresh report. Pass
+    # current to check the stored fingerprint against the registry first;
+    # without it the caller vouches that nothing else changed the theme.
+    target = fingerprint(accent_color, optional_colors, wallpaper)
+    applied = {} if force else load_applied(store)
+    if current is not None and applied:
+        applied = verify_applied(store, current, applied)
+
+    components = changed_components(applied, target)
+    if not components and not (batch is not None and len(batch)):
+        return None
+
+    # Forget the components first, so an apply that is cancelled or fails
+    # halfway is redone next time instead of being skipped as a no-op
+    stale = [key for key in components + (["wallpaper_path"] if "wallpaper" in components else []) if key in applied]
+    if stale:
+        for key in stale:
+            del applied[key]
+        save_applied(store, applied)
+
+    report = apply_theme(accent_color, optional_colors, wallpaper, batch=batch, components=components, **options)
+    applied.update((component, target[component]) for component in components)
+    if "wallpaper" in components:
+        applied["wallpaper_path"] = wallpaper_cache().lookup(wallpaper) or wallpaper
+    save_applied(store, applied)
+    return report
+
+def apply_preset_if_changed(store, name, **options):
+    accent_color, optional_colors, wallpaper = validate_preset(load_preset(store, name))
+    return apply_if_changed(store, accent_color, optional_colors, wallpaper, **options)
@@ -0,0 +1,230 @@
+import bisect
+import os
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+
+EMPTY_SWATCH = "#dcdcdc"
+SWATCH_SIZE = 12
+SWATCH_GAP = 3
+
+
+class PresetTile:
+    # One reusable tile. Widgets are created once and only reconfigured when
+    # the tile is bound to a different preset.
+    def __init__(self, gallery):
+        self.gallery = gallery
+        self.name = None
+        self.wallpaper = ""
+        width, height = gallery.tile_size
+
+        self.frame = tk.Frame(gallery.canvas, bg=gallery.bg)
+        self.thumb = tk.Label(self.frame, bg=EMPTY_SWATCH, width=gallery.thumb_size[0],
+                              height=gallery.thumb_size[1], image=gallery.blank_photo)
+        self.thumb.grid(row=0, column=0, rowspan=2, padx=(0, 4))
+        self.button = tk.Button(self.frame, width=16, bg="#e0e0e0", font=("Segoe UI", 9), relief="flat",
+                                command=self._clicked)
+        self.button.grid(row=0, column=1, sticky="w")
+        if gallery.decorate:
+            gallery.decorate(self.button, "#e0e0e0")
+
+        step = SWATCH_SIZE + SWATCH_GAP
+        self.swatches = tk.Canvas(self.frame, width=6 * step, height=SWATCH_SIZE, bg=gallery.bg,
+                                  highlightthickness=0)
+        self.swatches.grid(row=1, column=1, sticky="w", pady=(2, 0))
+        self.rects = [self.swatches.create_rectangle(i * step, 0, i * step + SWATCH_SIZE, SWATCH_SIZE, outline="")
+                      for i in range(6)]
+
+        self.window = gallery.canvas.create_window(0, 0, anchor="nw", window=self.frame,
+                                                   width=width - 10, height=height - 6)
+
+    def _clicked(self):
+        if self.name is not None:
+            self.gallery.on_select(self.name)
+
+    def place(self, index):
+        width, height = self.gallery.tile_size
+        row, column = divmod(index, self.gallery.columns)
+        self.gallery.canvas.coords(self.window, column * width + 5, row * height + 3)
+        self.gallery.canvas.itemconfigure(self.window, state="normal")
+
+    def hide(self):
+        self.gallery.canvas.itemconfigure(self.window, state="hidden")
+
+    def show(self, name, preset):
+        self.name = name
+        self.button.config(text=name)
+        colors = [preset.get("accent_color", "")] + list(preset.get("optional_colors", []))[:5]
+        for rect, color in zip(self.rects, colors + [""] * 6):
+            self.swatches.itemconfigure(rect, fill=color or EMPTY_SWATCH)
+        self.wallpaper = preset.get("wallpaper", "")
+        self.set_photo(self.gallery.thumbnail_for(self.wallpaper))
+
+    def set_photo(self, photo):
+        self.thumb.config(image=photo or self.gallery.blank_photo)
+        self.thumb.image = photo
+
+
+class PresetGallery:
+    # Scrollable grid of presets that only builds tiles for the visible rows.
+    # Tiles scrolled out of view go back to a pool and are rebound on demand.
+    # With a dispatcher, thumbnails missing from memory are built on a worker
+    # and tiles show a blank image until they arrive; without one they are
+    # built inline.
+    def __init__(self, parent, store, thumbnails, on_select, columns=4, tile_size=(215, 64),
+                 visible_rows=3, bg="#f3f3f3", decorate=None, dispatcher=None):
+        self.store = store
+        self.thumbnails = thumbnails
+        self.dispatcher = dispatcher
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnail") if dispatcher else None
+        self.loading = set()
+        self.failed = set()
+        self.thumb_size = thumbnails.size
+        self.on_select = on_select
+        self.columns = columns
+        self.tile_size = tile_size
+        self.bg = bg
+        self.decorate = decorate
+        self.blank_photo = tk.PhotoImage(width=self.thumb_size[0], height=self.thumb_size[1])
+
+        self.frame = tk.Frame(parent, bg=bg)
+        self.canvas = tk.Canvas(self.frame, width=columns * tile_size[0], height=visible_rows * tile_size[1],
+                                bg=bg, highlightthickness=0, yscrollincrement=tile_size[1])
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.config(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side="left")
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.names = store.names()
+        self.presets = {}
+        self.bound = {}
+        self.free = []
+        self.dirty = set()
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.frame.bind("<Enter>", lambda e: self.canvas.bind_all("<MouseWheel>", self._on_wheel))
+        self.frame.bind("<Leave>", lambda e: self.canvas.unbind_all("<MouseWheel>"))
+        self._update_scroll_region()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __len__(self):
+        return len(self.names)
+
+    # --- Incremental Updates ---
+
+    def add(self, name):
+        # Saving over an existing name only rebinds that tile
+        self.presets.pop(name, None)
+        self.failed.clear()  # the new preset may point at a file that now exists
+        if name in self.names:
+            self.dirty.add(name)
+        else:
+            bisect.insort(self.names, name)
+            self._update_scroll_region()
+        self.render()
+
+    def remove(self, name):
+        self.presets.pop(name, None)
+        if name in self.names:
+            self.names.remove(name)
+            self._update_scroll_region()
+            self.render()
+
+    # --- Rendering ---
+
+    def thumbnail_for(self, wallpaper):
+        # The photo if it is in memory, else None and a worker builds it
+        if not wallpaper or wallpaper in self.failed:
+            return None
+        if self.executor is None:
+            return self._build_photo(wallpaper)
+        try:
+            photo = self.thumbnails.cached_photo(wallpaper)
+        except OSError:
+            photo = None
+        if photo is None and wallpaper not in self.loading:
+            self.loading.add(wallpaper)
+            self.executor.submit(self._load, wallpaper)
+        return photo
+
+    def _build_photo(self, wallpaper):
+        if not os.path.exists(wallpaper):
+            return None
+        try:
+            return self.thumbnails.get_photo(wallpaper)
+        except Exception as e:
+            print(f"Could not build thumbnail for {wallpaper}:", e)
+            return None
+
+    def _load(self, wallpaper):
+        # Worker thread: decode or downscale only, no Tk calls
+        try:
+            img = self.thumbnails.get_image(wallpaper) if os.path.exists(wallpaper) else None
+        except Exception as e:
+            print(f"Could not build thumbnail for {wallpaper}:", e)
+            img = None
+        self.dispatcher.post(self._loaded, wallpaper, img)
+
+    def _loaded(self, wallpaper, img):
+        self.loading.discard(wallpaper)
+        if img is None:
+            self.failed.add(wallpaper)
+            return
+        try:
+            photo = self.thumbnails.put_photo(wallpaper, img)
+        except OSError:  # removed since the worker read it
+            self.failed.add(wallpaper)
+            return
+        for tile in self.bound.values():
+            if tile.wallpaper == wallpaper:
+                tile.set_photo(photo)
+
+    def _preset(self, name):
+        preset = self.presets.get(name)
+        if preset is None:
+            preset = self.presets[name] = self.store.get(name) or {}
+        return preset
+
+    def _visible_range(self):
+        tile_height = self.tile_size[1]
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), int(self.canvas["height"]))
+        first = int(top // tile_height) * self.columns
+        last = min(len(self.names), (int(bottom // tile_height) + 1) * self.columns)
+        return first, last
+
+    def render(self):
+        first, last = self._visible_range()
+        for index in [i for i in self.bound if i < first or i >= last]:
+            tile = self.bound.pop(index)
+            tile.hide()
+            self.free.append(tile)
+
+        for index in range(first, last):
+            name = self.names[index]
+            tile = self.bound.get(index)
+            if tile is None:
+                tile = self.free.pop() if self.free else PresetTile(self)
+                self.bound[index] = tile
+                tile.place(index)
+                tile.name = None
+            if tile.name != name or name in self.dirty:
+                tile.show(name, self._preset(name))
+        self.dirty.clear()
+
+    def _update_scroll_region(self):
+        rows = -(-len(self.names) // self.columns)
+        self.canvas.config(scrollregion=(0, 0, self.columns * self.tile_size[0], rows * self.tile_size[1]))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def _on_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
@@ -0,0 +1,108 @@
+# Applying one preset to many user profiles at once - loaded hives under
+# HKEY_USERS\<SID> or offline NTUSER.DAT files. Other users pick the values
+# up at their next logon, so no refresh broadcast is sent.
+import ctypes
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from registry import RegistryBatch, PrefixedBackend, default_backend, HKEY_USERS, REG_SZ
+from snapshot import WALLPAPER_VALUE
+from theme import preset_values
+from tracing import span
+
+
+KEY_ALL_ACCESS = 0xF003F
+
+HiveResult = namedtuple("HiveResult", "target ok changed seconds error")
+
+
+# --- Targets ---
+# open() returns (backend, hive handle) for RegistryBatch; close() releases
+# whatever open() acquired.
+
+class UserHive:
+    def __init__(self, sid, backend=None):
+        self.sid = sid
+        self.backend = backend
+        self.name = f"HKEY_USERS\\{sid}"
+
+    def open(self):
+        return PrefixedBackend(self.backend or default_backend(), self.sid), HKEY_USERS
+
+    def close(self):
+        pass
+
+
+def load_app_key(path):
+    # RegLoadAppKey needs no privileges but fails if the profile is in use
+    handle = ctypes.c_void_p()
+    result = ctypes.windll.advapi32.RegLoadAppKeyW(path, ctypes.byref(handle), KEY_ALL_ACCESS, 0, 0)
+    if result:
+        raise ctypes.WinError(result)
+    return handle.value
+
+def close_app_key(handle):
+    ctypes.windll.advapi32.RegCloseKey(ctypes.c_void_p(handle))
+
+
+class OfflineHive:
+    # The loader and unloader are swappable so tests can hand out fake roots
+    def __init__(self, path, backend=None, loader=load_app_key, unloader=close_app_key):
+        self.path = path
+        self.backend = backend
+        self.loader = loader
+        self.unloader = unloader
+        self.name = path
+        self.handle = None
+
+    def open(self):
+        self.handle = self.loader(self.path)
+        return self.backend or default_backend(), self.handle
+
+    def close(self):
+        if self.handle is not None:
+            self.unloader(self.handle)
+            self.handle = None
+
+
+# --- Engine ---
+
+def hive_values(accent_color, optional_colors, wallpaper):
+    # Same values as the single-user apply. The wallpaper is written as a
+    # plain value since SystemParametersInfo only affects the current user.
+    values = preset_values(accent_color, optional_colors)
+    if wallpaper:
+        values[WALLPAPER_VALUE] = (wallpaper, REG_SZ)
+    return values
+
+def apply_to_hive(target, values):
+    start = time.perf_counter()
+    try:
+        with span("hives.apply", target=target.name):
+            backend, hive = target.open()
+            try:
+                batch = RegistryBatch(backend, hive)
+                for (path, name), (value, value_type) in values.items():
+                    batch.set(path, name, value_type, value)
+                changed = batch.commit()
+            finally:
+                target.close()
+    except Exception as e:
+        return HiveResult(target.name, False, 0, time.perf_counter() - start, str(e))
+    return HiveResult(target.name, True, len(changed), time.perf_counter() - start, None)
+
+def apply_to_hives(accent_color, optional_colors, wallpaper, targets, max_workers=4):
+    # Values are computed once and shared read-only by the workers. Returns
+    # one HiveResult per target, in target order; a failing target does not
+    # stop the others.
+    values = hive_values(accent_color, optional_colors, wallpaper)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hive") as pool:
+        return list(pool.map(lambda target: apply_to_hive(target, values), targets))
+
+def format_results(results):
+    lines = []
+    for result in results:
+        status = f"{result.changed} values changed" if result.ok else f"failed: {result.error}"
+        lines.append(f"{result.target}  {result.seconds * 1000:.1f} ms  {status}")
+    return "\n".join(lines)
@@ -0,0 +1,117 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# --- Tk Channel ---
+
+class TkDispatcher:
+    # Hands callbacks from worker threads back to the Tk thread. Workers only
+    # touch the queue and root.after; widgets are only touched while draining.
+    def __init__(self, root):
+        self.root = root
+        self.queue = queue.Queue()
+
+    def post(self, callback, *args):
+        self.queue.put((callback, args))
+        try:
+            self.root.after(0, self._drain)
+        except RuntimeError:  # Tk already destroyed
+            pass
+
+    def _drain(self):
+        while True:
+            try:
+                callback, args = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+
+class InlineDispatcher:
+    # Runs callbacks on the calling thread - for scripts and tests without Tk
+    def post(self, callback, *args):
+        callback(*args)
+
+
+# --- Job Queue ---
+
+class Job:
+    def __init__(self, key, dispatcher, on_progress=None):
+        self.key = key
+        self.dispatcher = dispatcher
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        # Called between stages so a superseded job stops at the next boundary
+        if self._cancelled.is_set():
+            raise JobCancelled(self.key)
+
+    def progress(self, stage):
+        # Checkpoint plus status update
+        self.check()
+        self.notify(stage)
+
+    def notify(self, stage):
+        # Status update for stages that must finish once started
+        if self.on_progress:
+            self.dispatcher.post(self.on_progress, stage)
+
+
+class ApplyJobQueue:
+    # Runs apply work on a worker pool. Submitting a job under a key cancels
+    # the previous job with that key, so only the newest request is applied.
+    def __init__(self, dispatcher, max_workers=1):
+        self.dispatcher = dispatcher
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="theme-apply")
+        self.lock = threading.Lock()
+        self.latest = {}
+
+    def submit(self, key, func, on_done=None, on_error=None, on_progress=None):
+        job = Job(key, self.dispatcher, on_progress)
+        with self.lock:
+            previous = self.latest.get(key)
+            if previous:
+                previous.cancel()
+            self.latest[key] = job
+        self.executor.submit(self._run, job, func, on_done, on_error)
+        return job
+
+    def _run(self, job, func, on_done, on_error):
+        try:
+            job.check()
+            result = func(job)
+            job.check()
+        except JobCancelled:
+            return
+        except Exception as e:
+            if on_error:
+                self.dispatcher.post(on_error, e)
+            else:
+                print(f"Job {job.key} failed:", e)
+            return
+        finally:
+            with self.lock:
+                if self.latest.get(job.key) is job:
+                    del self.latest[job.key]
+        if on_done:
+            self.dispatcher.post(on_done, result)
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            with self.lock:
+                for job in self.latest.values():
+                    job.cancel()
+        self.executor.shutdown(wait=True)
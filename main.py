@@ -1,127 +1,39 @@
+import sys
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Scripting entry point - skips Tk and Pillow entirely
+    from cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
 import os
-import json
 import winreg
-import ctypes
 import tkinter as tk
 from tkinter import BooleanVar
 import tkinter.ttk as ttk
 from tkinter import filedialog, messagebox, simpledialog, colorchooser
-from PIL import Image, ImageTk
-import subprocess
 from functools import partial
+from registry import PendingBatch, PERSONALIZE_KEY, COLORS_KEY, REG_DWORD, REG_SZ
+from refresh import format_report
+from theme import validate_preset, restore_snapshot, prepare_wallpaper
+from fingerprint import apply_if_changed, clear_applied, verify_applied
+from color import darken_color, dword_to_hex, palette_to_hex, rgb_string, rgb_string_to_hex
+import snapshot
+from tracing import span
+from jobs import ApplyJobQueue, TkDispatcher
+from thumbnails import ThumbnailCache
+from preset_store import open_store
+from gallery import PresetGallery
+from watcher import ThemeWatcher
 
 
-# --- Utility Functions ---
-
-def hex_to_bgr(hex_color):
-    rgb = int(hex_color.lstrip('#'), 16)
-    bgr = ((rgb & 0xFF) << 16) | (rgb & 0xFF00) | ((rgb >> 16) & 0xFF)
-    return bgr
-
-def reverse_hex(hex_color):
-    hex_color = hex_color.lstrip('#')
-    r = hex_color[0:2]
-    g = hex_color[2:4]
-    b = hex_color[4:6]
-    return f"#{b}{g}{r}"
-
-def hex_to_bgra_bytes(hex_color):
-    hex_color = hex_color.lstrip('#')
-    r = int(hex_color[0:2], 16)
-    g = int(hex_color[2:4], 16)
-    b = int(hex_color[4:6], 16)
-    return bytes([b, g, r, 0xAA])
-
-def darken_color(hex_color, factor=0.85):
-    hex_color = hex_color.lstrip("#")
-    r = max(0, int(int(hex_color[0:2], 16) * factor))
-    g = max(0, int(int(hex_color[2:4], 16) * factor))
-    b = max(0, int(int(hex_color[4:6], 16) * factor))
-    return f"#{r:02x}{g:02x}{b:02x}"
-
 def add_hover_effect(widget, base_color):
     darker = darken_color(base_color)
     widget.bind("<Enter>", lambda e: widget.config(bg=darker))
     widget.bind("<Leave>", lambda e: widget.config(bg=base_color))
 
-# --- Core Theme Functions ---
-
-def set_accent_color(hex_color):
-    try:
-        bgr_color_value = hex_to_bgr(hex_color)
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                            r"Software\Microsoft\Windows\CurrentVersion\Explorer\Accent",
-                            0, winreg.KEY_SET_VALUE) as key:
-            winreg.SetValueEx(key, "AccentColorMenu", 0, winreg.REG_DWORD, bgr_color_value)
-
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                            r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize",
-                            0, winreg.KEY_SET_VALUE) as key:
-            winreg.SetValueEx(key, "ColorPrevalence", 0, winreg.REG_DWORD, 1)
-
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                            r"Software\Microsoft\Windows\DWM",
-                            0, winreg.KEY_SET_VALUE) as key:
-            winreg.SetValueEx(key, "ColorizationColor", 0, winreg.REG_DWORD, bgr_color_value)
-            winreg.SetValueEx(key, "ColorizationAfterglow", 0, winreg.REG_DWORD, bgr_color_value)
-            winreg.SetValueEx(key, "AccentColor", 0, winreg.REG_DWORD, bgr_color_value)
-
-        ctypes.windll.user32.SystemParametersInfoW(20, 0, 0, 0)
-        ctypes.windll.user32.SendMessageTimeoutW(0xFFFF, 0x1A, 0, 0, 0, 1000, None)
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to set accent color:\n{e}")
-
-def set_accent_palette(accent_color, optional_colors):
-    try:
-        reversed_accent = reverse_hex(accent_color)
-        main_bytes = hex_to_bgra_bytes(reversed_accent)
-
-        optional_bytes = []
-        for color in optional_colors:
-            if color:
-                reversed_color = reverse_hex(color)
-                optional_bytes.append(hex_to_bgra_bytes(reversed_color))
-            else:
-                optional_bytes.append(bytes([0, 0, 0, 0xAA]))
-
-        palette = (
-            optional_bytes[0] +
-            optional_bytes[1] +
-            optional_bytes[2] +
-            optional_bytes[3] +
-            optional_bytes[4] +
-            main_bytes +
-            main_bytes +
-            main_bytes
-        )
-
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                            r"Software\Microsoft\Windows\CurrentVersion\Explorer\Accent",
-                            0, winreg.KEY_SET_VALUE) as key:
-            winreg.SetValueEx(key, "AccentPalette", 0, winreg.REG_BINARY, palette)
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to set accent palette:\n{e}")
-
-def set_wallpaper(image_path):
-    try:
-        ctypes.windll.user32.SystemParametersInfoW(20, 0, image_path, 3)
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to set wallpaper:\n{e}")
-
-def restart_explorer():
-    try:
-        subprocess.run(["taskkill", "/f", "/im", "explorer.exe"], check=True)
-        subprocess.run(["start", "explorer"], shell=True)
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to restart Explorer:\n{e}")
-
 # --- Preset Handling ---
-def save_preset(accent_color, wallpaper, optional_colors):
-    preset_files = [f for f in os.listdir(os.getcwd()) if f.endswith(".json")]
-    if len(preset_files) >= 12:
-        messagebox.showerror("Limit Reached", "You can only save up to 12 presets.")
-        return
 
+def save_preset(accent_color, wallpaper, optional_colors):
     if not accent_color:
         messagebox.showerror("Error", "Please select an accent color before saving the preset.")
         return
@@ -148,17 +60,15 @@ def save_preset(accent_color, wallpaper, optional_colors):
         def on_confirm():
             name = entry.get().strip()
             if name:
-                filename = f"{name}.json"
                 preset_data = {
                     "accent_color": accent_color,
                     "wallpaper": wallpaper,
                     "optional_colors": optional_colors
                 }
                 try:
-                    with open(filename, "w") as f:
-                        json.dump(preset_data, f, indent=4)
-                    update_preset_viewer()
-                    messagebox.showinfo("Preset Saved", f"Saved preset: {filename}")
+                    preset_store.save(name, preset_data)
+                    update_preset_viewer(name)
+                    messagebox.showinfo("Preset Saved", f"Saved preset: {name}")
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to save preset:\n{e}")
                 popup.destroy()
@@ -181,37 +91,28 @@ def save_preset(accent_color, wallpaper, optional_colors):
 
     show_custom_preset_naming_popup(None)
 
-def load_preset(preset_file):
+def load_preset(preset_name):
     try:
-        with open(preset_file, "r") as file:
-            return json.load(file)
+        preset = preset_store.get(preset_name)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load preset:\n{e}")
         return None
+    if preset is None:
+        messagebox.showerror("Error", f"Preset not found: {preset_name}")
+    return preset
 
-def apply_preset(preset_file):
-    preset = load_preset(preset_file)
+def apply_preset(preset_name):
+    preset = load_preset(preset_name)
     if preset:
-        accent_color = preset.get("accent_color", "").strip()
-        wallpaper = preset.get("wallpaper", "").strip()
-        optional_colors = preset.get("optional_colors", [""] * 5)
-
-        if not accent_color or len(accent_color) != 7 or not accent_color.startswith("#"):
-            messagebox.showerror("Error", "Invalid accent color in preset.")
+        try:
+            accent_color, optional_colors, wallpaper = validate_preset(preset)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
 
-        selected_color.set(accent_color)
-        preview_label.config(bg=accent_color, text=f"Preview: {accent_color}")
-
-        for i, color in enumerate(optional_colors):
-            optional_color_vars[i].set(color)
-            optional_preview_labels[i].config(bg=color if color else "#dcdcdc", text=color if color else "Not set")
-
-        set_accent_color(reverse_hex(accent_color))
-        set_accent_palette(accent_color, optional_colors)
+        show_colors(accent_color, optional_colors)
 
         if wallpaper:
-            set_wallpaper(wallpaper)
             wallpaper_path.set(wallpaper)
             wallpaper_label.config(text=os.path.basename(wallpaper))
             display_wallpaper_preview(wallpaper)
@@ -220,33 +121,99 @@ def apply_preset(preset_file):
             wallpaper_label.config(text="No file selected")
             wallpaper_preview_label.config(image="")
 
-        restart_explorer()
-        messagebox.showinfo("Preset Applied", f"Applied preset: {os.path.splitext(preset_file)[0]}")
+        submit_apply(accent_color, optional_colors, wallpaper,
+                     "Preset Applied", f"Applied preset: {preset_name}")
+
+def update_preset_viewer(saved_name=None):
+    # Only the saved preset's tile is added or rebound
+    if saved_name is not None:
+        preset_gallery.add(saved_name)
+    preset_count_label.config(text=f"Saved Presets ({len(preset_gallery)})")
+
 
-def update_preset_viewer():
-    for widget in preset_frame.winfo_children():
-        widget.destroy()
+def toggle_transparency():
+    # Staged only - written together with the colors on the next apply
+    value = 1 if transparency_var.get() else 0
+    pending_batch.set(PERSONALIZE_KEY, "EnableTransparency", REG_DWORD, value)
+    print("Transparency staged as", value)
+    update_pending_label()
+
+def update_pending_label():
+    # Staged settings are only written by the next apply, so say so
+    count = len(pending_batch)
+    pending_label.config(text=f"{count} setting(s) pending - click Confirm & Apply to write them" if count else "")
+
+def own_writes(accent_color, optional_colors, wallpaper, batch):
+    # What this apply may write, for ThemeWatcher.expect. The wallpaper is
+    # prepared first, since Windows records the pre-scaled copy rather than
+    # the chosen file.
+    expected = {(path, name): entry for path, values in batch.pending.items() for name, entry in values.items()}
+    if accent_color:
+        if wallpaper:
+            prepare_wallpaper(wallpaper)
+        expected.update(snapshot.preset_snapshot(accent_color, optional_colors, wallpaper))
+    return expected
+
+def submit_apply(accent_color, optional_colors, wallpaper, title, message):
+    # A newer apply supersedes one that is still queued or running
+    def on_done(report):
+        update_pending_label()
+        if report is None:
+            status_label.config(text="Already applied")
+            return
+        status_label.config(text="Refreshed: " + format_report(report) if report else "")
+        messagebox.showinfo(title, message)
+
+    def on_error(e):
+        update_pending_label()
+        status_label.config(text="")
+        messagebox.showerror("Error", f"Failed to apply theme:\n{e}")
+
+    def run(job):
+        # The watcher keeps the recorded fingerprint honest, so no registry
+        # read is needed here. Staged toggles are committed with this apply,
+        # or handed back if a newer click cancels it first.
+        with pending_batch.applying() as batch:
+            expected = own_writes(accent_color, optional_colors, wallpaper, batch)
+            theme_watcher.expect(expected)
+            try:
+                return apply_if_changed(preset_store, accent_color, optional_colors, wallpaper, batch=batch,
+                                        job=job, transition_steps=TRANSITION_STEPS if transition_mode_var.get() else 0,
+                                        snapshot_path=last_snapshot_path)
+            except BaseException:
+                theme_watcher.forget(expected)
+                raise
+
+    apply_jobs.submit("apply", run,
+                      on_done=on_done, on_error=on_error,
+                      on_progress=lambda stage: status_label.config(text=stage))
+
+def undo_last_apply():
+    if not os.path.exists(last_snapshot_path):
+        messagebox.showinfo("Undo", "Nothing to undo yet.")
+        return
 
-    preset_files = [f for f in os.listdir(os.getcwd()) if f.endswith(".json")]
-    preset_count_label.config(text=f"Saved Presets ({len(preset_files)}/12)")
+    def run(job):
+        saved = snapshot.load(last_snapshot_path)
+        theme_watcher.expect(saved)
+        try:
+            report = restore_snapshot(saved, job=job)
+        except BaseException:
+            theme_watcher.forget(saved)
+            raise
+        clear_applied(preset_store)
+        return report
 
-    for i, preset_file in enumerate(preset_files):
-        preset_name = os.path.splitext(preset_file)[0]
-        btn = tk.Button(preset_frame, text=preset_name, width=20, height=2, bg="#e0e0e0",
-                        font=("Segoe UI", 9), relief="flat", command=lambda pf=preset_file: apply_preset(pf))
-        btn.grid(row=i // 4, column=i % 4, padx=5, pady=5)
-        add_hover_effect(btn, "#e0e0e0")
+    def on_done(report):
+        status_label.config(text="Refreshed: " + format_report(report) if report else "")
+        messagebox.showinfo("Undo", "Restored the theme from before the last apply.")
 
+    def on_error(e):
+        status_label.config(text="")
+        messagebox.showerror("Error", f"Failed to restore theme:\n{e}")
 
-def toggle_transparency():
-    key_path = r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize"
-    try:
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE) as key:
-            value = 1 if transparency_var.get() else 0
-            winreg.SetValueEx(key, "EnableTransparency", 0, winreg.REG_DWORD, value)
-            print("Transparency set to", value)
-    except Exception as e:
-        print("Failed to update transparency:", e)
+    apply_jobs.submit("apply", run, on_done=on_done, on_error=on_error,
+                      on_progress=lambda stage: status_label.config(text=stage))
 
 
 # --- GUI Callbacks ---
@@ -264,11 +231,40 @@ def choose_wallpaper():
         wallpaper_label.config(text=os.path.basename(path))
         display_wallpaper_preview(path)
 
+def show_colors(accent_color, optional_colors):
+    selected_color.set(accent_color)
+    preview_label.config(bg=accent_color, text=f"Preview: {accent_color}")
+
+    for i, color in enumerate(optional_colors):
+        optional_color_vars[i].set(color)
+        optional_preview_labels[i].config(bg=color if color else "#dcdcdc", text=color if color else "Not set")
+
+def extract_colors_from_wallpaper():
+    path = wallpaper_path.get()
+    if not path:
+        messagebox.showerror("Error", "Please choose a wallpaper first.")
+        return
+
+    def run(job):
+        from palette import extract_palette  # NumPy is only needed for this feature
+        job.progress("Extracting colors...")
+        return extract_palette(path, thumbnails=thumbnail_cache)
+
+    def on_done(result):
+        status_label.config(text="")
+        show_colors(*result)
+
+    def on_error(e):
+        status_label.config(text="")
+        messagebox.showerror("Error", f"Could not extract colors:\n{e}")
+
+    apply_jobs.submit("palette", run, on_done=on_done, on_error=on_error,
+                      on_progress=lambda stage: status_label.config(text=stage))
+
 def display_wallpaper_preview(path):
     try:
-        img = Image.open(path)
-        img.thumbnail((300, 200))
-        img_tk = ImageTk.PhotoImage(img)
+        with span("wallpaper_preview"):
+            img_tk = thumbnail_cache.get_photo(path)
         wallpaper_preview_label.config(image=img_tk, text="", bg="#dcdcdc")
         wallpaper_preview_label.image = img_tk
     except Exception as e:
@@ -278,16 +274,53 @@ def display_wallpaper_preview(path):
 
 def confirm_and_apply():
     color = selected_color.get()
+    optional_colors = [var.get() for var in optional_color_vars]
     if color:
-        optional_colors = [var.get() for var in optional_color_vars]
-        set_accent_color(reverse_hex(color))
-        set_accent_palette(color, optional_colors)
-
-        if wallpaper_path.get():
-            set_wallpaper(wallpaper_path.get())
-
-        restart_explorer()
-        messagebox.showinfo("Accent Applied", f"Applied color: {color.upper()}")
+        submit_apply(color, optional_colors, wallpaper_path.get(), "Accent Applied", f"Applied color: {color.upper()}")
+    elif len(pending_batch):
+        submit_apply("", optional_colors, "", "Settings Applied", "Applied pending settings")
+
+def sync_external_change(changes):
+    # Called on the Tk thread with a snapshot diff; only widgets whose value
+    # actually changed are touched
+    values = {name: entry for (_, name), (_, entry) in changes.items() if entry is not None}
+
+    # Settings writes AccentColorMenu as 0xAABBGGRR, while ColorizationColor
+    # is ARGB from every writer - the layout set_accent_color uses too
+    if "ColorizationColor" in values:
+        color = dword_to_hex(values["ColorizationColor"][0])
+        if color != selected_color.get().lower():
+            selected_color.set(color)
+            preview_label.config(bg=color, text=f"Preview: {color}")
+
+    if "AccentPalette" in values:
+        for i, color in enumerate(palette_to_hex(values["AccentPalette"][0])[:5]):
+            if color != optional_color_vars[i].get().lower():
+                optional_color_vars[i].set(color)
+                optional_preview_labels[i].config(bg=color if color else "#dcdcdc", text=color if color else "Not set")
+
+    if "EnableTransparency" in values:
+        transparency_var.set(bool(values["EnableTransparency"][0]))
+
+    for key_name, label in control_panel_preview_labels.items():
+        if key_name in values:
+            rgb_string = values[key_name][0]
+            control_panel_color_vars[key_name].set(rgb_string)
+            label.config(bg=rgb_string_to_hex(rgb_string), text=rgb_string)
+
+    wallpaper = values.get("Wallpaper", ("",))[0]
+    if wallpaper and os.path.normcase(wallpaper) != os.path.normcase(wallpaper_path.get()):
+        wallpaper_path.set(wallpaper)
+        wallpaper_label.config(text=os.path.basename(wallpaper))
+        display_wallpaper_preview(wallpaper)
+
+    status_label.config(text="Theme changed outside the app")
+
+def on_theme_change(changes, current):
+    # Watcher thread. The fingerprint check runs on the apply worker so it
+    # cannot interleave with an apply recording its own fingerprint.
+    apply_jobs.submit("verify", lambda job: verify_applied(preset_store, current))
+    dispatcher.post(sync_external_change, changes)
 
 # --- GUI Setup ---
 
@@ -300,6 +333,13 @@ wallpaper_path = tk.StringVar()
 selected_color = tk.StringVar()
 optional_color_vars = [tk.StringVar() for _ in range(5)]
 optional_preview_labels = []
+pending_batch = PendingBatch()
+last_snapshot_path = os.path.join(os.getcwd(), "last_theme.snapshot")
+dispatcher = TkDispatcher(root)
+apply_jobs = ApplyJobQueue(dispatcher)
+preset_store = open_store()
+thumbnail_dir = os.path.join(os.getcwd(), ".thumbnails")
+thumbnail_cache = ThumbnailCache(thumbnail_dir)
 
 main_frame = tk.Frame(root, bg="#f3f3f3")
 main_frame.pack(pady=20)
@@ -330,6 +370,10 @@ choose_wallpaper_btn = tk.Button(left_frame, text="Choose Wallpaper", command=ch
 choose_wallpaper_btn.pack()
 add_hover_effect(choose_wallpaper_btn, "#0078d7")
 
+extract_colors_btn = tk.Button(left_frame, text="Colors from Wallpaper", command=extract_colors_from_wallpaper, width=20, bg="#0078d7", fg="white", relief="flat")
+extract_colors_btn.pack(pady=(5, 0))
+add_hover_effect(extract_colors_btn, "#0078d7")
+
 right_frame = tk.Frame(main_frame, bg="#f3f3f3")
 right_frame.pack(side="right", padx=40)
 
@@ -354,18 +398,12 @@ control_panel_preview_labels = {}
 
 def choose_control_panel_color(key_name):
     color_code = colorchooser.askcolor(title=f"Choose color for {key_name}")
-    if color_code[0]:
-        r, g, b = map(int, color_code[0])
-        rgb_string = f"{r} {g} {b}"
-        control_panel_color_vars[key_name].set(rgb_string)
-        hex_color = f"#{r:02x}{g:02x}{b:02x}"
-        control_panel_preview_labels[key_name].config(bg=hex_color, text=rgb_string)
-
-        try:
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Control Panel\\Colors", 0, winreg.KEY_SET_VALUE) as key:
-                winreg.SetValueEx(key, key_name, 0, winreg.REG_SZ, rgb_string)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to set {key_name}:\n{e}")
+    if color_code[1]:
+        rgb = rgb_string(color_code[1])
+        control_panel_color_vars[key_name].set(rgb)
+        control_panel_preview_labels[key_name].config(bg=color_code[1], text=rgb)
+        pending_batch.set(COLORS_KEY, key_name, REG_SZ, rgb)
+        update_pending_label()
 
 for key, label in control_panel_color_labels:
     control_panel_color_vars[key] = tk.StringVar()
@@ -425,6 +463,17 @@ transparency_check = ttk.Checkbutton(
 )
 transparency_check.pack(pady=5)
 
+TRANSITION_STEPS = 20
+transition_mode_var = BooleanVar(value=False)
+
+transition_check = ttk.Checkbutton(
+    right_frame,
+    text="Smooth transition",
+    variable=transition_mode_var,
+    style="Switch.TCheckbutton"
+)
+transition_check.pack(pady=5)
+
 button_section = tk.Frame(root, bg="#f3f3f3")
 button_section.pack(pady=10)
 
@@ -439,18 +488,36 @@ save_btn = tk.Button(button_section, text="Save Preset", command=lambda: save_pr
 save_btn.pack(side="right", padx=20)
 add_hover_effect(save_btn, "#0078d7")
 
+undo_btn = tk.Button(button_section, text="Undo Last Apply", command=undo_last_apply,
+                     relief="flat", bg="#e0e0e0", height=2, width=18)
+undo_btn.pack(side="right", padx=20)
+add_hover_effect(undo_btn, "#e0e0e0")
+
+status_label = tk.Label(root, text="", fg="gray", bg="#f3f3f3", font=("Segoe UI", 9))
+status_label.pack()
+
+pending_label = tk.Label(root, text="", fg="#b36b00", bg="#f3f3f3", font=("Segoe UI", 9))
+pending_label.pack()
+
 presets_container = tk.Frame(root, bg="#f3f3f3")
 presets_container.pack(pady=(20, 10), fill="x")
 
-preset_count_label = tk.Label(presets_container, text="Saved Presets (0/12)", font=("Segoe UI", 11), bg="#f3f3f3")
+preset_count_label = tk.Label(presets_container, text="Saved Presets (0)", font=("Segoe UI", 11), bg="#f3f3f3")
 preset_count_label.pack(side="top", pady=(0, 10))
 
-preset_frame = tk.Frame(presets_container, bg="#f3f3f3")
-preset_frame.pack()
+# Gallery tiles are downscaled from the preview thumbnails, on a worker
+preset_gallery = PresetGallery(presets_container, preset_store,
+                               ThumbnailCache(thumbnail_dir, size=(64, 40), source=thumbnail_cache),
+                               on_select=apply_preset, decorate=add_hover_effect, dispatcher=dispatcher)
+preset_gallery.pack()
+update_preset_viewer()
 
-try:
-    update_preset_viewer()
-except:
-    pass
+# The theme may have changed while the app was closed
+apply_jobs.submit("verify", lambda job: verify_applied(preset_store, snapshot.take_snapshot()))
+theme_watcher = ThemeWatcher(on_theme_change)
+theme_watcher.start()
 
 root.mainloop()
+theme_watcher.stop()
+preset_gallery.close()
+apply_jobs.shutdown()
@@ -16,6 +16,23 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
+# Console build of the command line for login scripts and terminals. The
+# windowed main.exe also accepts the commands, but has no console to print to.
+cli_a = Analysis(
+    ['cli.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter'],
+    noarchive=False,
+    optimize=0,
+)
+cli_pyz = PYZ(cli_a.pure)
+
 exe = EXE(
     pyz,
     a.scripts,
@@ -36,3 +53,24 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+cli_exe = EXE(
+    cli_pyz,
+    cli_a.scripts,
+    cli_a.binaries,
+    cli_a.datas,
+    [],
+    name='theme-switcher',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
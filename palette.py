@@ -0,0 +1,66 @@
+import numpy as np
+
+from thumbnails import decode_thumbnail
+
+
+SAMPLE_SIZE = (128, 128)
+
+# Blend factors for the eight AccentPalette entries, lightest first.
+# Positive values mix towards white, negative values towards black.
+SHADE_STEPS = np.array([0.60, 0.40, 0.20, 0.0, -0.25, -0.45, -0.65, -0.80], dtype=np.float32)
+
+
+def load_pixels(path, sample_size=SAMPLE_SIZE, thumbnails=None):
+    # Works on the draft/reduced decode, never the full-size image. With a
+    # ThumbnailCache the preview thumbnail is sampled instead, so a wallpaper
+    # that has already been previewed is not decoded again.
+    if thumbnails is not None:
+        img = thumbnails.get_image(path)
+        img.thumbnail(sample_size)
+    else:
+        img = decode_thumbnail(path, sample_size)
+    return np.asarray(img.convert("RGB"), dtype=np.float32).reshape(-1, 3)
+
+def kmeans(pixels, k=6, iterations=8):
+    # Deterministic start: evenly spaced samples of the brightness-sorted pixels
+    order = np.argsort(pixels.sum(axis=1))
+    centers = pixels[order[np.linspace(0, len(order) - 1, k).astype(int)]].copy()
+    for _ in range(iterations):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=pixels[:, c], minlength=k) for c in range(3)], axis=1)
+        filled = counts > 0
+        centers[filled] = sums[filled] / counts[filled, None]
+    return centers, counts
+
+def pick_accent(centers, counts):
+    # Most common cluster, weighted towards saturated colors; near-black and
+    # near-white clusters only win if nothing else is left
+    high = centers.max(axis=1)
+    low = centers.min(axis=1)
+    saturation = (high - low) / np.maximum(high, 1)
+    usable = (high > 40) & (low < 235)
+    score = counts / max(counts.sum(), 1) * (0.2 + saturation) * np.where(usable, 1.0, 0.01)
+    return centers[score.argmax()]
+
+def derive_shades(accent_rgb):
+    # Returns an 8x3 uint8 array, lightest shade first
+    accent = np.asarray(accent_rgb, dtype=np.float32)[None, :]
+    steps = SHADE_STEPS[:, None]
+    shades = np.where(steps >= 0, accent + (255 - accent) * steps, accent * (1 + steps))
+    return np.clip(np.rint(shades), 0, 255).astype(np.uint8)
+
+def to_hex(rgb):
+    r, g, b = (int(v) for v in rgb)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def extract_palette(path, k=6, thumbnails=None):
+    # Returns (accent hex, five optional slot hexes) for the given wallpaper.
+    # Stays under 100 ms for an 8K JPEG only when its preview thumbnail is
+    # already cached (pass thumbnails); a cold 8K decode alone takes a few
+    # hundred ms. See benchmarks/bench_palette.py.
+    centers, counts = kmeans(load_pixels(path, thumbnails=thumbnails), k)
+    accent = np.clip(np.rint(pick_accent(centers, counts)), 0, 255).astype(np.uint8)
+    shades = derive_shades(accent)
+    return to_hex(accent), [to_hex(shade) for shade in shades[:5]]
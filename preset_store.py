@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    name TEXT PRIMARY KEY,
+    accent_color TEXT NOT NULL,
+    wallpaper TEXT NOT NULL DEFAULT '',
+    optional_colors TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+DEFAULT_DB_NAME = "presets.db"
+
+
+def default_store_path():
+    return os.environ.get("THEME_PRESET_DB") or os.path.join(os.getcwd(), DEFAULT_DB_NAME)
+
+def open_store(path=None, json_dir=None):
+    # Shared by the GUI and the CLI, so presets saved by older builds as
+    # *.json files in the working directory show up in both
+    store = PresetStore(path)
+    try:
+        store.migrate_json_dir(json_dir or os.getcwd())
+    except OSError as e:
+        print("Could not import JSON presets:", e)
+    return store
+
+def is_preset(data):
+    return isinstance(data, dict) and isinstance(data.get("accent_color"), str)
+
+
+class PresetStore:
+    # All presets live in one SQLite file indexed by name. The sorted name
+    # list is kept in memory, so listing and counting never touch the disk.
+    def __init__(self, path=None):
+        self.path = path or default_store_path()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._names = [row[0] for row in self.conn.execute("SELECT name FROM presets ORDER BY name")]
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def names(self):
+        return list(self._names)
+
+    def get(self, name):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT accent_color, wallpaper, optional_colors FROM presets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        return {"accent_color": row[0], "wallpaper": row[1], "optional_colors": json.loads(row[2])}
+
+    def save(self, name, preset):
+        self.save_many([(name, preset)])
+
+    def save_many(self, items):
+        # One transaction - either every preset is written or none is
+        rows = [(name, preset.get("accent_color", ""), preset.get("wallpaper", "") or "",
+                 json.dumps(preset.get("optional_colors", [""] * 5)), time.time())
+                for name, preset in items]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO presets (name, accent_color, wallpaper, optional_colors, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            self._names = sorted(set(self._names).union(row[0] for row in rows))
+
+    def delete(self, name):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM presets WHERE name = ?", (name,))
+            if name in self._names:
+                self._names.remove(name)
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_json_dir(self, directory):
+        # Imports the old one-file-per-preset layout once. The JSON files are
+        # left in place so older builds keep working.
+        if self.get_meta("json_migrated"):
+            return 0
+
+        items = []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename), "r") as file:
+                    data = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {filename}:", e)
+                continue
+            if is_preset(data):
+                items.append((os.path.splitext(filename)[0], data))
+
+        if items:
+            self.save_many(items)
+        self.set_meta("json_migrated", "1")
+        return len(items)
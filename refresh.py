@@ -0,0 +1,136 @@
+import ctypes
+import subprocess
+import time
+
+from registry import ACCENT_KEY, PERSONALIZE_KEY, DWM_KEY, COLORS_KEY
+from color import rgb_string_to_colorref
+from tracing import span
+
+
+# --- Win32 Constants ---
+
+HWND_BROADCAST = 0xFFFF
+WM_SYSCOLORCHANGE = 0x0015
+WM_SETTINGCHANGE = 0x001A
+WM_DWMCOLORIZATIONCOLORCHANGED = 0x0320
+SMTO_ABORTIFHUNG = 0x0002
+
+# GetSysColor indices for the Control Panel\Colors values we write
+SYS_COLOR_INDEX = {
+    "Hilight": 13,
+    "HotTrackingColor": 26,
+    "MenuHilight": 29,
+}
+
+
+# --- OS Call Layer ---
+
+class Win32Calls:
+    # Thin wrapper over the user32 calls the refresh steps need, so they can
+    # be replaced with a stub off Windows.
+    def broadcast(self, message, wparam=0, lparam=None, timeout_ms=1000):
+        result = ctypes.c_size_t()
+        ok = ctypes.windll.user32.SendMessageTimeoutW(
+            HWND_BROADCAST, message, ctypes.c_size_t(wparam), lparam, SMTO_ABORTIFHUNG, timeout_ms, ctypes.byref(result))
+        return bool(ok)
+
+    def set_sys_colors(self, colors):
+        # colors: {sys color index: 0x00BBGGRR}
+        count = len(colors)
+        indexes = (ctypes.c_int * count)(*colors.keys())
+        values = (ctypes.c_uint32 * count)(*colors.values())
+        return bool(ctypes.windll.user32.SetSysColors(count, indexes, values))
+
+    def restart_explorer(self):
+        subprocess.run(["taskkill", "/f", "/im", "explorer.exe"], check=True)
+        subprocess.run(["start", "explorer"], shell=True)
+        return True
+
+
+class StubWin32Calls:
+    # Records every call instead of touching the OS
+    def __init__(self, broadcast_ok=True):
+        self.broadcast_ok = broadcast_ok
+        self.calls = []
+
+    def broadcast(self, message, wparam=0, lparam=None, timeout_ms=1000):
+        self.calls.append(("broadcast", message, wparam, lparam))
+        return self.broadcast_ok
+
+    def set_sys_colors(self, colors):
+        self.calls.append(("set_sys_colors", dict(colors)))
+        return True
+
+    def restart_explorer(self):
+        self.calls.append(("restart_explorer",))
+        return True
+
+
+# --- Refresh Engine ---
+
+class RefreshEngine:
+    # Picks the cheapest notifications that cover a set of changed registry
+    # values. Explorer is only restarted when a broadcast fails or when the
+    # caller forces it.
+    #
+    # colorization_notify only tells top-level windows that the colorization
+    # color changed, the message DWM itself sends; it does not make DWM reload
+    # the value (that API is undocumented). The frames and accents are picked
+    # up through the ImmersiveColorSet broadcast.
+    def __init__(self, calls=None, timeout_ms=1000):
+        self.calls = calls or Win32Calls()
+        self.timeout_ms = timeout_ms
+
+    def plan(self, changed, force_restart=False):
+        steps = []
+        colors = {SYS_COLOR_INDEX[name]: rgb_string_to_colorref(value)
+                  for (path, name), value in changed.items()
+                  if path == COLORS_KEY and name in SYS_COLOR_INDEX and value is not None}
+        if colors:
+            steps.append(("sys_colors", colors))
+
+        colorization = changed.get((DWM_KEY, "ColorizationColor"))
+        if colorization is not None:
+            steps.append(("colorization_notify", colorization))
+
+        if any(path in (ACCENT_KEY, PERSONALIZE_KEY, DWM_KEY) for path, _ in changed):
+            steps.append(("immersive_color_set", None))
+
+        if force_restart:
+            steps.append(("explorer_restart", None))
+        return steps
+
+    def run(self, changed, force_restart=False):
+        # Returns [(step, seconds, ok)] for every step that ran
+        report = [self._timed(step, arg) for step, arg in self.plan(changed, force_restart)]
+        broadcast_failed = any(step == "immersive_color_set" and not ok for step, _, ok in report)
+        if broadcast_failed and not force_restart:
+            report.append(self._timed("explorer_restart", None))
+        return report
+
+    def _timed(self, step, arg):
+        start = time.perf_counter()
+        with span("refresh." + step) as step_span:
+            try:
+                ok = self._run_step(step, arg)
+            except Exception as e:
+                print(f"Refresh step {step} failed:", e)
+                ok = False
+            step_span.set(ok=ok)
+        return step, time.perf_counter() - start, ok
+
+    def _run_step(self, step, arg):
+        if step == "sys_colors":
+            return self.calls.set_sys_colors(arg)
+        if step == "colorization_notify":
+            return self.calls.broadcast(WM_DWMCOLORIZATIONCOLORCHANGED, arg | 0xFF000000, 1, self.timeout_ms)
+        if step == "immersive_color_set":
+            return self.calls.broadcast(WM_SETTINGCHANGE, 0, "ImmersiveColorSet", self.timeout_ms)
+        if step == "explorer_restart":
+            return self.calls.restart_explorer()
+        raise ValueError(f"Unknown refresh step: {step}")
+
+
+def format_report(report):
+    return ", ".join(f"{step} {seconds * 1000:.1f} ms{'' if ok else ' (failed)'}"
+                     for step, seconds, ok in report)
@@ -0,0 +1,282 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    import winreg
+except ImportError:  # Not on Windows - only the fake backend is usable
+    winreg = None
+
+
+# --- Registry Constants ---
+
+HKEY_CURRENT_USER = winreg.HKEY_CURRENT_USER if winreg else 0x80000001
+HKEY_USERS = winreg.HKEY_USERS if winreg else 0x80000003
+
+REG_SZ = 1
+REG_BINARY = 3
+REG_DWORD = 4
+
+ACCENT_KEY = r"Software\Microsoft\Windows\CurrentVersion\Explorer\Accent"
+PERSONALIZE_KEY = r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize"
+DWM_KEY = r"Software\Microsoft\Windows\DWM"
+COLORS_KEY = r"Control Panel\Colors"
+DESKTOP_KEY = r"Control Panel\Desktop"
+
+
+# --- Backends ---
+
+class WinregBackend:
+    def open_key(self, hive, path, write=False):
+        access = winreg.KEY_QUERY_VALUE
+        if write:
+            access |= winreg.KEY_SET_VALUE
+        return winreg.OpenKey(hive, path, 0, access)
+
+    def close_key(self, handle):
+        handle.Close()
+
+    def query_value(self, handle, name):
+        return winreg.QueryValueEx(handle, name)
+
+    def set_value(self, handle, name, value_type, value):
+        winreg.SetValueEx(handle, name, 0, value_type, value)
+
+    def delete_value(self, handle, name):
+        winreg.DeleteValue(handle, name)
+
+
+class FakeRegistryBackend:
+    # In-memory stand-in for winreg. Counts every open and write so the
+    # batching savings can be measured without a real registry.
+    def __init__(self, values=None):
+        self.keys = {}
+        self.opens = 0
+        self.reads = 0
+        self.writes = 0
+        self.fail_on = None  # (path, name) that raises on write, for rollback tests
+        self.changed = threading.Condition()  # notified on every write, for watchers
+        self.key_versions = {}
+        for (hive, path, name), (value, value_type) in (values or {}).items():
+            self.keys.setdefault((hive, path.lower()), {})[name] = (value, value_type)
+
+    def open_key(self, hive, path, write=False):
+        self.opens += 1
+        key = (hive, path.lower())
+        if key not in self.keys:
+            if not write:
+                raise FileNotFoundError(f"Registry key not found: {path}")
+            self.keys[key] = {}
+        return (key, path)
+
+    def close_key(self, handle):
+        pass
+
+    def query_value(self, handle, name):
+        self.reads += 1
+        key, path = handle
+        try:
+            return self.keys[key][name]
+        except KeyError:
+            raise FileNotFoundError(f"Registry value not found: {path}\\{name}")
+
+    def set_value(self, handle, name, value_type, value):
+        key, path = handle
+        if self.fail_on == (path, name):
+            raise OSError(f"Simulated write failure: {path}\\{name}")
+        self.writes += 1
+        self.keys[key][name] = (value, value_type)
+        self._notify(key)
+
+    def delete_value(self, handle, name):
+        key, path = handle
+        if name not in self.keys[key]:
+            raise FileNotFoundError(f"Registry value not found: {path}\\{name}")
+        self.writes += 1
+        del self.keys[key][name]
+        self._notify(key)
+
+    def _notify(self, key):
+        with self.changed:
+            self.key_versions[key] = self.key_versions.get(key, 0) + 1
+            self.changed.notify_all()
+
+    def get(self, path, name, hive=HKEY_CURRENT_USER):
+        return self.keys.get((hive, path.lower()), {}).get(name)
+
+    def reset_counters(self):
+        self.opens = self.reads = self.writes = 0
+
+
+class PrefixedBackend:
+    # Wraps another backend and prepends a key prefix to every path, so
+    # HKEY_USERS\<SID>\... can be driven by code written for HKCU paths
+    def __init__(self, backend, prefix):
+        self.backend = backend
+        self.prefix = prefix.rstrip("\\") + "\\"
+
+    def open_key(self, hive, path, write=False):
+        return self.backend.open_key(hive, self.prefix + path, write)
+
+    def close_key(self, handle):
+        self.backend.close_key(handle)
+
+    def query_value(self, handle, name):
+        return self.backend.query_value(handle, name)
+
+    def set_value(self, handle, name, value_type, value):
+        self.backend.set_value(handle, name, value_type, value)
+
+    def delete_value(self, handle, name):
+        self.backend.delete_value(handle, name)
+
+
+_default_backend = None
+
+def default_backend():
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = WinregBackend()
+    return _default_backend
+
+def set_default_backend(backend):
+    global _default_backend
+    _default_backend = backend
+
+
+# --- Batched Writer ---
+
+class RegistryBatch:
+    # Collects pending values and commits them with one open per key.
+    # Values that already hold the target data are skipped, and a failed
+    # write restores everything written so far.
+    def __init__(self, backend=None, hive=HKEY_CURRENT_USER):
+        self.backend = backend
+        self.hive = hive
+        self.pending = {}
+
+    def set(self, path, name, value_type, value):
+        self.pending.setdefault(path, {})[name] = (value, value_type)
+
+    def delete(self, path, name):
+        self.pending.setdefault(path, {})[name] = (None, None)
+
+    def __len__(self):
+        return sum(len(values) for values in self.pending.values())
+
+    def commit(self):
+        backend = self.backend or default_backend()
+        handles = {}
+        undo = []
+        changed = {}
+        try:
+            for path, values in self.pending.items():
+                handle = handles[path] = backend.open_key(self.hive, path, write=True)
+                for name, (value, value_type) in values.items():
+                    try:
+                        current = tuple(backend.query_value(handle, name))
+                    except FileNotFoundError:
+                        current = None
+                    if current == (value, value_type) or (value_type is None and current is None):
+                        continue
+                    if value_type is None:
+                        backend.delete_value(handle, name)
+                    else:
+                        backend.set_value(handle, name, value_type, value)
+                    undo.append((path, name, current))
+                    changed[(path, name)] = value
+        except Exception:
+            self._rollback(backend, handles, undo)
+            raise
+        finally:
+            for handle in handles.values():
+                backend.close_key(handle)
+        self.pending = {}
+        return changed
+
+    def _rollback(self, backend, handles, undo):
+        for path, name, previous in reversed(undo):
+            try:
+                if previous is None:
+                    backend.delete_value(handles[path], name)
+                else:
+                    backend.set_value(handles[path], name, previous[1], previous[0])
+            except Exception as e:
+                print(f"Failed to roll back {path}\\{name}:", e)
+
+
+class PendingBatch:
+    # Values staged from the UI between applies. An apply takes them all at
+    # once and hands them back if it is cancelled or fails before they are
+    # written, so a superseded apply never loses a staged toggle.
+    def __init__(self, backend=None, hive=HKEY_CURRENT_USER):
+        self.backend = backend
+        self.hive = hive
+        self.lock = threading.Lock()
+        self.values = {}  # {path: {name: (value, type)}}
+
+    def set(self, path, name, value_type, value):
+        with self.lock:
+            self.values.setdefault(path, {})[name] = (value, value_type)
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(values) for values in self.values.values())
+
+    def take(self):
+        # Returns (batch, staged); pass staged to restore() if the batch is
+        # not committed
+        with self.lock:
+            staged, self.values = self.values, {}
+        batch = RegistryBatch(self.backend, self.hive)
+        for path, values in staged.items():
+            for name, (value, value_type) in values.items():
+                batch.set(path, name, value_type, value)
+        return batch, staged
+
+    def restore(self, staged):
+        # Anything staged since take() wins
+        with self.lock:
+            for path, values in staged.items():
+                current = self.values.setdefault(path, {})
+                for name, entry in values.items():
+                    current.setdefault(name, entry)
+
+    @contextmanager
+    def applying(self):
+        # RegistryBatch.commit rolls back on failure, so on any exception the
+        # staged values are still unwritten
+        batch, staged = self.take()
+        try:
+            yield batch
+        except BaseException:
+            self.restore(staged)
+            raise
+
+
+# --- Bulk Reads ---
+
+def read_values(wanted, backend=None, hive=HKEY_CURRENT_USER):
+    # Reads (path, name) pairs with one open per key. Missing keys and values
+    # come back as None.
+    backend = backend or default_backend()
+    by_path = {}
+    for path, name in wanted:
+        by_path.setdefault(path, []).append(name)
+
+    result = {}
+    for path, names in by_path.items():
+        try:
+            handle = backend.open_key(hive, path)
+        except FileNotFoundError:
+            result.update(((path, name), None) for name in names)
+            continue
+        try:
+            for name in names:
+                try:
+                    value, value_type = backend.query_value(handle, name)
+                    result[(path, name)] = (value, value_type)
+                except FileNotFoundError:
+                    result[(path, name)] = None
+        finally:
+            backend.close_key(handle)
+    return result
@@ -0,0 +1,163 @@
+import datetime
+import heapq
+import json
+import math
+import threading
+import time
+from collections import namedtuple
+
+
+# Wall-clock time can jump (suspend, DST, NTP) while a monotonic wait is in
+# progress, so long sleeps are split and the deadline re-checked. A jump past
+# several switches is handled in Scheduler.run.
+MAX_SLEEP = 600
+
+Rule = namedtuple("Rule", ["at", "preset", "offset_minutes"])
+
+
+# --- Sun Position ---
+
+def sun_times(day, latitude, longitude):
+    # Sunrise equation (NOAA approximation). Returns (sunrise, sunset) as UTC
+    # timestamps, or None during polar day or night. Longitude is east-positive.
+    n = day.toordinal() - datetime.date(2000, 1, 1).toordinal()
+    mean_solar = n - longitude / 360.0
+    anomaly = math.radians((357.5291 + 0.98560028 * mean_solar) % 360)
+    center = 1.9148 * math.sin(anomaly) + 0.0200 * math.sin(2 * anomaly) + 0.0003 * math.sin(3 * anomaly)
+    ecliptic = math.radians((math.degrees(anomaly) + center + 180 + 102.9372) % 360)
+    transit = 2451545.0 + mean_solar + 0.0053 * math.sin(anomaly) - 0.0069 * math.sin(2 * ecliptic)
+
+    sin_declination = math.sin(ecliptic) * math.sin(math.radians(23.4397))
+    cos_declination = math.cos(math.asin(sin_declination))
+    lat = math.radians(latitude)
+    cos_hour_angle = ((math.sin(math.radians(-0.833)) - math.sin(lat) * sin_declination)
+                      / (math.cos(lat) * cos_declination))
+    if not -1 <= cos_hour_angle <= 1:
+        return None
+
+    half_day = math.degrees(math.acos(cos_hour_angle)) / 360.0
+    to_timestamp = lambda julian: (julian - 2440587.5) * 86400.0
+    return to_timestamp(transit - half_day), to_timestamp(transit + half_day)
+
+
+# --- Rules ---
+
+def parse_rules(config):
+    rules = []
+    for entry in config.get("rules", []):
+        at = entry["at"].strip().lower()
+        if at not in ("sunrise", "sunset"):
+            hours, minutes = (int(part) for part in at.split(":"))
+            if not (0 <= hours < 24 and 0 <= minutes < 60):
+                raise ValueError(f"Invalid time in schedule: {entry['at']}")
+        rules.append(Rule(at, entry["preset"], float(entry.get("offset_minutes", 0))))
+    return rules
+
+def load_config(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+class SystemClock:
+    def time(self):
+        return time.time()
+
+    def wait(self, stop_event, timeout):
+        # True when stopped
+        return stop_event.wait(timeout)
+
+
+class Scheduler:
+    # Keeps the next firing time of every rule in a heap and sleeps until the
+    # earliest one instead of polling.
+    def __init__(self, rules, apply, latitude=None, longitude=None, clock=None):
+        self.rules = rules
+        self.apply = apply
+        self.latitude = latitude
+        self.longitude = longitude
+        self.clock = clock or SystemClock()
+        self.stop_event = threading.Event()
+        for rule in rules:
+            if rule.at in ("sunrise", "sunset") and (latitude is None or longitude is None):
+                raise ValueError("Sunrise/sunset rules need a latitude and longitude.")
+
+    def occurrence(self, rule, day):
+        if rule.at in ("sunrise", "sunset"):
+            times = sun_times(day, self.latitude, self.longitude)
+            if times is None:
+                return None
+            base = times[0] if rule.at == "sunrise" else times[1]
+        else:
+            hours, minutes = (int(part) for part in rule.at.split(":"))
+            base = datetime.datetime.combine(day, datetime.time(hours, minutes)).timestamp()
+        return base + rule.offset_minutes * 60
+
+    def next_fire(self, rule, after):
+        # First occurrence strictly after the given timestamp, searched a
+        # year ahead to get past polar night/day
+        day = datetime.date.fromtimestamp(after) - datetime.timedelta(days=1)
+        for offset in range(367):
+            when = self.occurrence(rule, day + datetime.timedelta(days=offset))
+            if when is not None and when > after:
+                return when
+        return None
+
+    def last_fire(self, rule, before):
+        day = datetime.date.fromtimestamp(before) + datetime.timedelta(days=1)
+        for offset in range(367):
+            when = self.occurrence(rule, day - datetime.timedelta(days=offset))
+            if when is not None and when <= before:
+                return when
+        return None
+
+    def upcoming(self, now=None):
+        now = self.clock.time() if now is None else now
+        heap = []
+        for index, rule in enumerate(self.rules):
+            when = self.next_fire(rule, now)
+            if when is not None:
+                heap.append((when, index))
+        heapq.heapify(heap)
+        return heap
+
+    def current_rule(self, now):
+        # The rule that fired most recently - applied on start so the machine
+        # does not wait for the next switch to be in the right theme
+        fired = [(self.last_fire(rule, now), index) for index, rule in enumerate(self.rules)]
+        fired = [entry for entry in fired if entry[0] is not None]
+        return self.rules[max(fired)[1]] if fired else None
+
+    def run(self, catch_up=True):
+        now = self.clock.time()
+        if catch_up:
+            rule = self.current_rule(now)
+            if rule:
+                self._fire(rule)
+
+        heap = self.upcoming(now)
+        while heap and not self.stop_event.is_set():
+            when, index = heap[0]
+            remaining = when - self.clock.time()
+            if remaining > 0:
+                if self.clock.wait(self.stop_event, min(remaining, MAX_SLEEP)):
+                    break
+                continue
+
+            # Due. After a suspend several switches may have passed; only the
+            # most recent one is applied and every rule is rescheduled from
+            # now, so nothing missed is replayed.
+            now = self.clock.time()
+            rule = self.current_rule(now)
+            if rule:
+                self._fire(rule)
+            heap = self.upcoming(now)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _fire(self, rule):
+        try:
+            self.apply(rule.preset)
+            print(f"{datetime.datetime.fromtimestamp(self.clock.time()):%Y-%m-%d %H:%M} Applied preset: {rule.preset}")
+        except Exception as e:
+            print(f"Failed to apply preset {rule.preset}:", e)
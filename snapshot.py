@@ -0,0 +1,135 @@
+import struct
+
+from registry import (RegistryBatch, read_values, HKEY_CURRENT_USER, ACCENT_KEY, PERSONALIZE_KEY, DWM_KEY,
+                      COLORS_KEY, DESKTOP_KEY, REG_SZ, REG_BINARY, REG_DWORD)
+
+
+# Every value the app reads or writes. The position in this list is the
+# value's id in the binary format, so only ever append to it.
+THEME_VALUES = [
+    (ACCENT_KEY, "AccentColorMenu"),
+    (ACCENT_KEY, "AccentPalette"),
+    (PERSONALIZE_KEY, "ColorPrevalence"),
+    (PERSONALIZE_KEY, "EnableTransparency"),
+    (DWM_KEY, "ColorizationColor"),
+    (DWM_KEY, "ColorizationAfterglow"),
+    (DWM_KEY, "AccentColor"),
+    (COLORS_KEY, "Hilight"),
+    (COLORS_KEY, "HotTrackingColor"),
+    (COLORS_KEY, "MenuHilight"),
+    (DESKTOP_KEY, "Wallpaper"),
+]
+
+WALLPAPER_VALUE = (DESKTOP_KEY, "Wallpaper")
+
+MAGIC = b"TSS1"
+MISSING = 0xFF
+
+
+def take_snapshot(backend=None, hive=HKEY_CURRENT_USER):
+    # One pass, one open per key. Returns {(path, name): (value, type) or None}
+    return read_values(THEME_VALUES, backend, hive)
+
+def preset_snapshot(accent_color, optional_colors, wallpaper):
+    # What a preset would leave behind. Only covers the values it sets.
+    from theme import preset_values, wallpaper_cache
+
+    target = preset_values(accent_color, optional_colors)
+    if wallpaper:
+        # Windows records the pre-scaled copy when one was used
+        try:
+            wallpaper = wallpaper_cache().lookup(wallpaper) or wallpaper
+        except OSError:
+            pass
+        target[WALLPAPER_VALUE] = (wallpaper, REG_SZ)
+    return target
+
+
+# --- Binary Format ---
+# MAGIC, uint8 count, then per value: uint8 id, uint8 type (MISSING if
+# absent), and the payload - uint32 for DWORD, uint16 length + bytes for
+# binary and UTF-8 strings.
+
+def encode(snapshot):
+    ids = {key: index for index, key in enumerate(THEME_VALUES)}
+    parts = [MAGIC, struct.pack("<B", len(snapshot))]
+    for key, entry in snapshot.items():
+        if entry is None:
+            parts.append(struct.pack("<BB", ids[key], MISSING))
+            continue
+        value, value_type = entry
+        parts.append(struct.pack("<BB", ids[key], value_type))
+        if value_type == REG_DWORD:
+            parts.append(struct.pack("<I", value))
+        else:
+            payload = value.encode("utf-8") if value_type == REG_SZ else bytes(value)
+            parts.append(struct.pack("<H", len(payload)) + payload)
+    return b"".join(parts)
+
+def decode(data):
+    if data[:4] != MAGIC:
+        raise ValueError("Not a theme snapshot.")
+    count = data[4]
+    offset = 5
+    snapshot = {}
+    for _ in range(count):
+        value_id, value_type = struct.unpack_from("<BB", data, offset)
+        offset += 2
+        key = THEME_VALUES[value_id]
+        if value_type == MISSING:
+            snapshot[key] = None
+        elif value_type == REG_DWORD:
+            snapshot[key] = (struct.unpack_from("<I", data, offset)[0], REG_DWORD)
+            offset += 4
+        else:
+            length = struct.unpack_from("<H", data, offset)[0]
+            payload = data[offset + 2:offset + 2 + length]
+            offset += 2 + length
+            value = payload.decode("utf-8") if value_type == REG_SZ else bytes(payload)
+            snapshot[key] = (value, value_type)
+    return snapshot
+
+def save(snapshot, path):
+    with open(path, "wb") as file:
+        file.write(encode(snapshot))
+
+def load(path):
+    with open(path, "rb") as file:
+        return decode(file.read())
+
+
+# --- Diff & Rollback ---
+
+def diff(current, target):
+    # {(path, name): (current entry, target entry)} for every value in target
+    # that differs; values absent from target are left alone
+    return {key: (current.get(key), entry) for key, entry in target.items() if current.get(key) != entry}
+
+def format_entry(entry):
+    if entry is None:
+        return "<missing>"
+    value, value_type = entry
+    if value_type == REG_BINARY:
+        return bytes(value).hex()
+    if value_type == REG_DWORD:
+        return f"0x{value:08X}"
+    return str(value)
+
+def rollback(snapshot, backend=None, hive=HKEY_CURRENT_USER, set_wallpaper=None):
+    # Writes only the values that differ from the snapshot. Returns the
+    # changed values in the same form as RegistryBatch.commit. The wallpaper
+    # goes through set_wallpaper so Windows reloads it.
+    changes = diff(take_snapshot(backend, hive), snapshot)
+    wallpaper = changes.pop(WALLPAPER_VALUE, None)
+
+    batch = RegistryBatch(backend, hive)
+    for (path, name), (_, entry) in changes.items():
+        if entry is None:
+            batch.delete(path, name)
+        else:
+            batch.set(path, name, entry[1], entry[0])
+    changed = batch.commit()
+
+    if wallpaper and wallpaper[1] and set_wallpaper:
+        set_wallpaper(wallpaper[1][0])
+    return changed
@@ -0,0 +1,75 @@
+# The string helpers color.py replaced, copied verbatim from theme.py,
+# refresh.py and main.py before the change. Reference only: test_color.py
+# checks the new helpers against them and benchmarks/bench_color.py times
+# both.
+
+
+def hex_to_bgr(hex_color):
+    rgb = int(hex_color.lstrip('#'), 16)
+    bgr = ((rgb & 0xFF) << 16) | (rgb & 0xFF00) | ((rgb >> 16) & 0xFF)
+    return bgr
+
+def reverse_hex(hex_color):
+    hex_color = hex_color.lstrip('#')
+    r = hex_color[0:2]
+    g = hex_color[2:4]
+    b = hex_color[4:6]
+    return f"#{b}{g}{r}"
+
+def hex_to_bgra_bytes(hex_color):
+    hex_color = hex_color.lstrip('#')
+    r = int(hex_color[0:2], 16)
+    g = int(hex_color[2:4], 16)
+    b = int(hex_color[4:6], 16)
+    return bytes([b, g, r, 0xAA])
+
+def darken_color(hex_color, factor=0.85):
+    hex_color = hex_color.lstrip("#")
+    r = max(0, int(int(hex_color[0:2], 16) * factor))
+    g = max(0, int(int(hex_color[2:4], 16) * factor))
+    b = max(0, int(int(hex_color[4:6], 16) * factor))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def dword_to_hex(value):
+    return f"#{(value >> 16) & 0xFF:02x}{(value >> 8) & 0xFF:02x}{value & 0xFF:02x}"
+
+def palette_to_hex(blob):
+    colors = []
+    for i in range(0, len(blob) - 3, 4):
+        r, g, b = blob[i], blob[i + 1], blob[i + 2]
+        colors.append(f"#{r:02x}{g:02x}{b:02x}" if (r, g, b) != (0, 0, 0) else "")
+    return colors
+
+def build_accent_palette(accent_color, optional_colors):
+    reversed_accent = reverse_hex(accent_color)
+    main_bytes = hex_to_bgra_bytes(reversed_accent)
+
+    optional_bytes = []
+    for color in optional_colors:
+        if color:
+            reversed_color = reverse_hex(color)
+            optional_bytes.append(hex_to_bgra_bytes(reversed_color))
+        else:
+            optional_bytes.append(bytes([0, 0, 0, 0xAA]))
+
+    return (
+        optional_bytes[0] +
+        optional_bytes[1] +
+        optional_bytes[2] +
+        optional_bytes[3] +
+        optional_bytes[4] +
+        main_bytes +
+        main_bytes +
+        main_bytes
+    )
+
+def rgb_string_to_colorref(rgb_string):
+    r, g, b = (int(part) for part in rgb_string.split())
+    return (b << 16) | (g << 8) | r
+
+def rgb_string_to_hex(rgb_string):
+    r, g, b = map(int, rgb_string.split())
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def rgb_string(r, g, b):
+    return f"{r} {g} {b}"
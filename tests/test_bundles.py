@@ -0,0 +1,63 @@
+import os
+import zipfile
+
+import pytest
+
+from bundles import BundleError, export_bundle, import_bundle, MANIFEST_NAME
+from preset_store import PresetStore
+
+
+def make_store(tmp_path, wallpaper):
+    store = PresetStore(str(tmp_path / "presets.db"))
+    store.save_many([("day", {"accent_color": "#336699", "wallpaper": str(wallpaper)}),
+                     ("night", {"accent_color": "#112233", "wallpaper": str(wallpaper)}),
+                     ("plain", {"accent_color": "#445566", "wallpaper": ""})])
+    return store
+
+
+def test_round_trip_stores_absolute_wallpaper_paths(tmp_path, monkeypatch):
+    wallpaper = tmp_path / "sky.jpg"
+    wallpaper.write_bytes(b"\xff\xd8 not really a jpeg")
+    store = make_store(tmp_path, wallpaper)
+    assert export_bundle(store, str(tmp_path / "out.zip")) == (3, 1)
+    with zipfile.ZipFile(tmp_path / "out.zip") as bundle:
+        assert MANIFEST_NAME in bundle.namelist()
+
+    target = PresetStore(str(tmp_path / "imported.db"))
+    monkeypatch.chdir(tmp_path)
+    assert import_bundle(target, "out.zip", "wallpapers") == (3, 1)
+    imported = target.get("day")["wallpaper"]
+    assert os.path.isabs(imported)
+    assert open(imported, "rb").read() == wallpaper.read_bytes()
+    assert target.get("plain")["wallpaper"] == ""
+
+
+def test_failed_export_leaves_no_partial_zip(tmp_path):
+    wallpaper = tmp_path / "sky.jpg"
+    wallpaper.write_bytes(b"sky")
+    store = make_store(tmp_path, wallpaper)
+    path = tmp_path / "out.zip"
+    path.write_bytes(b"older bundle")
+
+    with pytest.raises(KeyError):
+        export_bundle(store, str(path), ["day", "missing"])
+    assert path.read_bytes() == b"older bundle"
+    assert sorted(os.listdir(tmp_path)) == ["out.zip", "presets.db", "sky.jpg"]
+
+
+def test_tampered_blob_is_rejected(tmp_path):
+    wallpaper = tmp_path / "sky.jpg"
+    wallpaper.write_bytes(b"sky pixels")
+    export_bundle(make_store(tmp_path, wallpaper), str(tmp_path / "out.zip"))
+
+    # Same manifest, blob contents swapped for bytes of another hash
+    with zipfile.ZipFile(tmp_path / "out.zip") as src, zipfile.ZipFile(tmp_path / "bad.zip", "w") as dst:
+        for info in src.infolist():
+            dst.writestr(info, b"evil pixels" if info.filename.startswith("blobs/") else src.read(info))
+
+    target = PresetStore(str(tmp_path / "imported.db"))
+    wallpaper_dir = tmp_path / "wallpapers"
+    with pytest.raises(BundleError):
+        import_bundle(target, str(tmp_path / "bad.zip"), str(wallpaper_dir))
+    assert os.listdir(wallpaper_dir) == []
+    assert target.names() == []
@@ -0,0 +1,28 @@
+import json
+import sys
+
+import cli
+from preset_store import PresetStore
+
+
+def make_db(tmp_path):
+    path = str(tmp_path / "presets.db")
+    store = PresetStore(path)
+    store.save("dusk", {"accent_color": "#123456", "wallpaper": "", "optional_colors": [""] * 5})
+    store.close()
+    return path
+
+
+def test_export_to_stdout(tmp_path, capsys):
+    assert cli.main(["--db", make_db(tmp_path), "export", "dusk"]) == 0
+    assert json.loads(capsys.readouterr().out)["accent_color"] == "#123456"
+
+
+def test_windowed_build_without_streams(tmp_path, monkeypatch):
+    # console=False builds start with sys.stdout and sys.stderr set to None
+    monkeypatch.setattr(sys, "stdout", None)
+    monkeypatch.setattr(sys, "stderr", None)
+    db = make_db(tmp_path)
+    assert cli.main(["--db", db, "export"]) == 0
+    assert cli.main(["--db", db, "list"]) == 0
+    assert cli.main(["--db", db, "export", "missing"]) == 2
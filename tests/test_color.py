@@ -0,0 +1,72 @@
+# Property checks: over seeded random inputs every helper in color.py gives
+# the same output as the code it replaced (tests/legacy_color.py).
+import random
+
+import pytest
+
+import color
+import legacy_color
+import theme
+
+
+SAMPLES = 20000
+
+
+def random_hex(rng):
+    # Mixed letter case, with and without the leading #
+    text = f"{rng.getrandbits(24):06x}"
+    text = "".join(c.upper() if rng.random() < 0.5 else c for c in text)
+    return text if rng.random() < 0.1 else "#" + text
+
+
+@pytest.fixture
+def colors():
+    rng = random.Random(16)
+    return [random_hex(rng) for _ in range(SAMPLES)] + ["#000000", "#ffffff", "#FFFFFF", "000000"]
+
+
+@pytest.mark.parametrize("name", ["hex_to_bgr", "reverse_hex", "hex_to_bgra_bytes", "darken_color"])
+def test_hex_helpers_match_legacy(colors, name):
+    new, old = getattr(color, name), getattr(legacy_color, name)
+    for value in colors:
+        assert new(value) == old(value), value
+
+
+def test_darken_factors_match_legacy(colors):
+    for factor in (0.0, 0.5, 0.85, 0.99, 1.0):
+        for value in colors[:2000]:
+            assert color.darken_color(value, factor) == legacy_color.darken_color(value, factor)
+
+
+def test_accent_palette_round_trip_matches_legacy(colors):
+    rng = random.Random(7)
+    for _ in range(SAMPLES // 4):
+        accent = rng.choice(colors)
+        optional = [rng.choice(colors) if rng.random() < 0.6 else "" for _ in range(5)]
+        blob = theme.build_accent_palette(accent, optional)
+        assert blob == legacy_color.build_accent_palette(accent, optional)
+        assert color.palette_to_hex(blob) == legacy_color.palette_to_hex(blob)
+
+
+def test_dword_and_rgb_string_helpers_match_legacy():
+    rng = random.Random(3)
+    for _ in range(SAMPLES):
+        dword = rng.getrandbits(32)  # Windows may set the top byte
+        assert color.dword_to_hex(dword) == legacy_color.dword_to_hex(dword)
+        r, g, b = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+        text = legacy_color.rgb_string(r, g, b)
+        assert color.rgb_string_to_colorref(text) == legacy_color.rgb_string_to_colorref(text)
+        assert color.rgb_string_to_hex(text) == legacy_color.rgb_string_to_hex(text)
+        assert color.rgb_string(f"#{r:02x}{g:02x}{b:02x}") == text
+
+
+def test_color_is_a_value():
+    assert color.parse_hex("#A1B2C3") == color.parse_hex("a1b2c3")
+    assert len({color.parse_hex("#a1b2c3"), color.parse_rgb_string("161 178 195")}) == 1
+    assert color.parse_hex("#a1b2c3").swapped().hex == "#c3b2a1"
+
+
+def test_short_optional_lists_are_padded():
+    full = theme.build_accent_palette("#336699", ["#112233", "", "", "", ""])
+    assert theme.build_accent_palette("#336699", ["#112233"]) == full
+    assert len(theme.build_accent_palette("#336699", [])) == 32
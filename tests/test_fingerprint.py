@@ -0,0 +1,97 @@
+import pytest
+
+import registry
+import theme
+from fingerprint import apply_if_changed, load_applied, verify_applied
+from jobs import JobCancelled
+from preset_store import PresetStore
+from refresh import StubWin32Calls
+from registry import FakeRegistryBackend, ACCENT_KEY, DWM_KEY, REG_DWORD
+from snapshot import take_snapshot
+
+
+OPTIONAL = ["#112233", "", "#445566", "", ""]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    # No wallpaper in these presets, so nothing reaches SystemParametersInfo
+    fake = FakeRegistryBackend()
+    monkeypatch.setattr(registry, "_default_backend", fake)
+    monkeypatch.setattr(theme.refresh_engine, "calls", StubWin32Calls())
+    return fake
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PresetStore(str(tmp_path / "presets.db"))
+    yield store
+    store.close()
+
+
+class CancelAt:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def check(self):
+        pass
+
+    def progress(self, stage):
+        if stage == self.stage:
+            raise JobCancelled("apply")
+
+    def notify(self, stage):
+        pass
+
+
+def test_repeat_apply_touches_nothing(backend, store):
+    assert apply_if_changed(store, "#336699", OPTIONAL, "") is not None
+    backend.reset_counters()
+    assert apply_if_changed(store, "#336699", OPTIONAL, "") is None
+    assert (backend.opens, backend.reads, backend.writes) == (0, 0, 0)
+
+
+def test_palette_change_only_rewrites_the_palette(backend, store):
+    apply_if_changed(store, "#336699", OPTIONAL, "")
+    accent = backend.get(DWM_KEY, "ColorizationColor")
+    backend.reset_counters()
+
+    assert apply_if_changed(store, "#336699", ["#abcdef"] + OPTIONAL[1:], "") is not None
+    assert backend.writes == 1
+    assert backend.get(ACCENT_KEY, "AccentPalette")[0][:3] == bytes.fromhex("abcdef")
+    assert backend.get(DWM_KEY, "ColorizationColor") == accent
+
+
+def test_external_change_is_reapplied(backend, store):
+    apply_if_changed(store, "#336699", OPTIONAL, "")
+    original = backend.get(DWM_KEY, "AccentColor")
+    handle = backend.open_key(registry.HKEY_CURRENT_USER, DWM_KEY, write=True)
+    backend.set_value(handle, "AccentColor", REG_DWORD, 0x00FF00)
+
+    applied = verify_applied(store, take_snapshot(backend))
+    assert "accent" not in applied and "palette" in applied
+    assert load_applied(store) == applied
+
+    backend.reset_counters()
+    assert apply_if_changed(store, "#336699", OPTIONAL, "") is not None
+    assert backend.writes == 1
+    assert backend.get(DWM_KEY, "AccentColor") == original
+
+
+def test_interrupted_apply_is_not_recorded(backend, store):
+    apply_if_changed(store, "#336699", OPTIONAL, "")
+    with pytest.raises(JobCancelled):
+        apply_if_changed(store, "#996633", OPTIONAL, "", job=CancelAt("Writing registry..."))
+    assert "accent" not in load_applied(store)
+
+    backend.fail_on = (DWM_KEY, "AccentColor")
+    with pytest.raises(OSError):
+        apply_if_changed(store, "#996633", OPTIONAL, "")
+    assert "accent" not in load_applied(store)
+
+    # Neither attempt is mistaken for an apply that already happened
+    backend.fail_on = None
+    backend.reset_counters()
+    assert apply_if_changed(store, "#996633", OPTIONAL, "") is not None
+    assert backend.writes == 5
+    assert apply_if_changed(store, "#996633", OPTIONAL, "") is None
@@ -0,0 +1,68 @@
+import hives
+from hives import UserHive, OfflineHive, apply_to_hives, hive_values
+from registry import FakeRegistryBackend, HKEY_USERS, ACCENT_KEY, DWM_KEY, REG_DWORD
+from snapshot import WALLPAPER_VALUE
+
+
+SIDS = ["S-1-5-21-1001", "S-1-5-21-1002", "S-1-5-21-1003"]
+OPTIONAL = ["#112233", "", "#445566", "", ""]  # five slots, as validate_preset returns
+
+
+def test_user_hives_get_every_value():
+    backend = FakeRegistryBackend()
+    results = apply_to_hives("#336699", OPTIONAL, "C:\\Wallpapers\\a.jpg",
+                             [UserHive(sid, backend) for sid in SIDS])
+    expected = hive_values("#336699", OPTIONAL, "C:\\Wallpapers\\a.jpg")
+    assert [result.target for result in results] == [f"HKEY_USERS\\{sid}" for sid in SIDS]
+    assert all(result.ok and result.changed == len(expected) for result in results)
+    for sid in SIDS:
+        for (path, name), entry in expected.items():
+            assert backend.get(f"{sid}\\{path}", name, HKEY_USERS) == entry
+        assert len(backend.get(f"{sid}\\{ACCENT_KEY}", "AccentPalette", HKEY_USERS)[0]) == 32
+
+
+def test_second_apply_changes_nothing():
+    backend = FakeRegistryBackend()
+    targets = [UserHive(sid, backend) for sid in SIDS]
+    apply_to_hives("#336699", OPTIONAL, "", targets)
+    backend.reset_counters()
+    results = apply_to_hives("#336699", OPTIONAL, "", targets)
+    assert all(result.ok and result.changed == 0 for result in results)
+    assert backend.writes == 0
+
+
+def test_failing_target_does_not_stop_the_others():
+    backend = FakeRegistryBackend()
+    loaded = []
+    unloaded = []
+
+    def loader(path):
+        if path.endswith("locked.dat"):
+            raise OSError("The process cannot access the file because it is being used by another process")
+        loaded.append(path)
+        return path  # the fake root handle is the hive key in FakeRegistryBackend
+
+    backend.fail_on = (f"{SIDS[1]}\\{DWM_KEY}", "AccentColor")
+    targets = [UserHive(SIDS[0], backend), UserHive(SIDS[1], backend),
+               OfflineHive("D:\\Users\\guest\\NTUSER.DAT", backend, loader, unloaded.append),
+               OfflineHive("D:\\Users\\locked.dat", backend, loader, unloaded.append)]
+    results = apply_to_hives("#336699", OPTIONAL, "", targets)
+
+    assert [result.ok for result in results] == [True, False, True, False]
+    assert "Simulated write failure" in results[1].error
+    assert "being used" in results[3].error
+    assert loaded == unloaded == ["D:\\Users\\guest\\NTUSER.DAT"]
+    assert backend.get(DWM_KEY, "ColorizationColor", "D:\\Users\\guest\\NTUSER.DAT")[1] == REG_DWORD
+    assert len(backend.get(ACCENT_KEY, "AccentPalette", "D:\\Users\\guest\\NTUSER.DAT")[0]) == 32
+    # The failed hive was rolled back, not left half written
+    assert backend.get(f"{SIDS[1]}\\{DWM_KEY}", "ColorizationColor", HKEY_USERS) is None
+
+
+def test_values_are_computed_once(monkeypatch):
+    calls = []
+    original = hives.preset_values
+    monkeypatch.setattr(hives, "preset_values", lambda *args: calls.append(args) or original(*args))
+    backend = FakeRegistryBackend()
+    apply_to_hives("#336699", OPTIONAL, "", [UserHive(sid, backend) for sid in SIDS])
+    assert len(calls) == 1
+    assert WALLPAPER_VALUE not in hive_values("#336699", OPTIONAL, "")
@@ -0,0 +1,62 @@
+import threading
+
+from jobs import ApplyJobQueue, InlineDispatcher
+from registry import FakeRegistryBackend, PendingBatch, PERSONALIZE_KEY, COLORS_KEY, REG_DWORD, REG_SZ
+
+
+def test_newest_job_under_a_key_wins():
+    queue = ApplyJobQueue(InlineDispatcher())
+    release = threading.Event()
+    done = []
+    queue.submit("apply", lambda job: release.wait(5) and job.check() or "A", on_done=done.append)
+    queue.submit("apply", lambda job: "B", on_done=done.append)
+    queue.submit("apply", lambda job: "C", on_done=done.append)
+    release.set()
+    queue.shutdown(cancel=False)
+    assert done == ["C"]
+
+
+def test_superseded_apply_hands_back_staged_values():
+    backend = FakeRegistryBackend()
+    pending = PendingBatch(backend)
+    pending.set(PERSONALIZE_KEY, "EnableTransparency", REG_DWORD, 0)
+    queue = ApplyJobQueue(InlineDispatcher())
+    started = threading.Event()
+    release = threading.Event()
+    done = []
+
+    def first(job):
+        with pending.applying() as batch:
+            started.set()
+            release.wait(5)
+            job.progress("Writing registry...")  # raises once the second click cancels this job
+            return batch.commit()
+
+    def second(job):
+        with pending.applying() as batch:
+            return batch.commit()
+
+    queue.submit("apply", first, on_done=done.append)
+    started.wait(5)
+    queue.submit("apply", second, on_done=done.append)
+    release.set()
+    queue.shutdown(cancel=False)
+
+    assert done == [{(PERSONALIZE_KEY, "EnableTransparency"): 0}]
+    assert backend.get(PERSONALIZE_KEY, "EnableTransparency") == (0, REG_DWORD)
+    assert len(pending) == 0
+
+
+def test_restore_keeps_values_staged_since_take():
+    pending = PendingBatch(FakeRegistryBackend())
+    pending.set(PERSONALIZE_KEY, "EnableTransparency", REG_DWORD, 0)
+    pending.set(COLORS_KEY, "Hilight", REG_SZ, "1 2 3")
+    _, staged = pending.take()
+    pending.set(PERSONALIZE_KEY, "EnableTransparency", REG_DWORD, 1)
+    pending.restore(staged)
+
+    batch, _ = pending.take()
+    assert batch.pending == {
+        PERSONALIZE_KEY: {"EnableTransparency": (1, REG_DWORD)},
+        COLORS_KEY: {"Hilight": ("1 2 3", REG_SZ)},
+    }
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from color import hex_to_bgra_bytes, reverse_hex
+from palette import SHADE_STEPS, derive_shades, extract_palette, kmeans, load_pixels, to_hex
+from theme import build_accent_palette
+from thumbnails import ThumbnailCache
+
+
+def striped_wallpaper(path, size, colors):
+    # Vertical bands, widest first, with a little noise
+    width, height = size
+    weights = np.linspace(len(colors), 1, len(colors))
+    bounds = np.concatenate([[0], np.cumsum(weights / weights.sum() * width)]).astype(int)
+    pixels = np.zeros((height, width, 3), dtype=np.float32)
+    for color, left, right in zip(colors, bounds[:-1], bounds[1:]):
+        pixels[:, left:right] = color
+    pixels += np.random.default_rng(0).normal(0, 6, pixels.shape)
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path, quality=90)
+    return str(path)
+
+
+def test_derive_shades_orders_light_to_dark_around_the_accent():
+    shades = derive_shades([30, 120, 200]).astype(int)
+    assert shades.shape == (len(SHADE_STEPS), 3)
+    assert list(shades[3]) == [30, 120, 200]
+    brightness = shades.sum(axis=1)
+    assert all(np.diff(brightness) < 0)
+
+
+def test_kmeans_finds_separated_clusters():
+    pixels = np.array([[250, 0, 0]] * 60 + [[0, 0, 250]] * 40, dtype=np.float32)
+    centers, counts = kmeans(pixels, k=2)
+    found = sorted((tuple(np.rint(c).astype(int)), n) for c, n in zip(centers, counts))
+    assert found == [((0, 0, 250), 40), ((250, 0, 0), 60)]
+
+
+def test_extracted_palette_bytes_match_hex_to_bgra_bytes(tmp_path):
+    path = striped_wallpaper(tmp_path / "wall.jpg", (640, 360), [(20, 90, 200), (240, 240, 240), (30, 30, 30)])
+    accent, optional = extract_palette(path)
+
+    r, g, b = (int(accent[i:i + 2], 16) for i in (1, 3, 5))
+    assert abs(r - 20) + abs(g - 90) + abs(b - 200) < 30  # the saturated band wins
+    assert optional == [to_hex(shade) for shade in derive_shades([r, g, b])[:5]]
+
+    blob = build_accent_palette(accent, optional)
+    expected = b"".join(hex_to_bgra_bytes(reverse_hex(color)) for color in optional + [accent] * 3)
+    assert blob == expected
+    assert len(blob) == 32
+    for i, color in enumerate(optional):
+        assert blob[i * 4:i * 4 + 4] == bytes([int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16), 0xAA])
+
+
+def test_previewed_wallpaper_is_not_decoded_again(tmp_path, monkeypatch):
+    path = striped_wallpaper(tmp_path / "wall.jpg", (640, 360), [(200, 40, 40), (10, 10, 10)])
+    cache = ThumbnailCache(str(tmp_path / "thumbs"))
+    cache.get_image(path)  # what showing the preview does
+
+    import thumbnails
+    monkeypatch.setattr(thumbnails, "decode_thumbnail", lambda *a: pytest.fail("decoded the source again"))
+    pixels = load_pixels(path, thumbnails=cache)
+    assert pixels.shape[1] == 3 and len(pixels) <= 128 * 128
+
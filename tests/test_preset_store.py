@@ -0,0 +1,37 @@
+import json
+
+from preset_store import PresetStore, open_store
+
+
+def write_json_preset(directory, name, accent):
+    with open(directory / f"{name}.json", "w") as file:
+        json.dump({"accent_color": accent, "wallpaper": "", "optional_colors": [""] * 5}, file)
+
+
+def test_open_store_imports_json_presets_once(tmp_path):
+    write_json_preset(tmp_path, "dusk", "#123456")
+    (tmp_path / "settings.json").write_text('{"not": "a preset"}')
+
+    store = open_store(str(tmp_path / "presets.db"), str(tmp_path))
+    assert store.names() == ["dusk"]
+    assert store.get("dusk")["accent_color"] == "#123456"
+    store.delete("dusk")
+    store.close()
+
+    store = open_store(str(tmp_path / "presets.db"), str(tmp_path))
+    assert len(store) == 0  # deleted presets do not come back from the JSON files
+    store.close()
+
+
+def test_save_get_and_names_stay_sorted(tmp_path):
+    store = PresetStore(str(tmp_path / "presets.db"))
+    store.save_many([("b", {"accent_color": "#000002"}), ("a", {"accent_color": "#000001"})])
+    store.save("c", {"accent_color": "#000003", "optional_colors": ["#ffffff"] + [""] * 4})
+    assert store.names() == ["a", "b", "c"]
+    assert store.get("c")["optional_colors"][0] == "#ffffff"
+    assert store.get("missing") is None
+    store.close()
+
+    reopened = PresetStore(str(tmp_path / "presets.db"))
+    assert reopened.names() == ["a", "b", "c"]
+    reopened.close()
@@ -0,0 +1,45 @@
+from refresh import RefreshEngine, StubWin32Calls, SYS_COLOR_INDEX, WM_DWMCOLORIZATIONCOLORCHANGED, \
+    WM_SETTINGCHANGE, format_report
+from registry import ACCENT_KEY, COLORS_KEY, DESKTOP_KEY, DWM_KEY, PERSONALIZE_KEY
+
+
+def test_plan_maps_each_key_to_its_step():
+    engine = RefreshEngine(StubWin32Calls())
+    assert engine.plan({}) == []
+    assert engine.plan({(COLORS_KEY, "Hilight"): "255 0 0", (COLORS_KEY, "Unknown"): "1 2 3"}) == [
+        ("sys_colors", {SYS_COLOR_INDEX["Hilight"]: 0x0000FF})]
+    assert engine.plan({(DWM_KEY, "ColorizationColor"): 0x336699}) == [
+        ("colorization_notify", 0x336699), ("immersive_color_set", None)]
+    for path in (ACCENT_KEY, PERSONALIZE_KEY):
+        assert engine.plan({(path, "Anything"): 1}) == [("immersive_color_set", None)]
+    assert engine.plan({(DESKTOP_KEY, "Wallpaper"): "C:\\a.jpg"}) == []
+    assert engine.plan({}, force_restart=True) == [("explorer_restart", None)]
+
+
+def test_run_sends_the_planned_calls():
+    calls = StubWin32Calls()
+    report = RefreshEngine(calls).run({(COLORS_KEY, "MenuHilight"): "1 2 3",
+                                       (DWM_KEY, "ColorizationColor"): 0x336699})
+    assert [step for step, _, _ in report] == ["sys_colors", "colorization_notify", "immersive_color_set"]
+    assert all(ok and seconds >= 0 for _, seconds, ok in report)
+    assert calls.calls == [
+        ("set_sys_colors", {SYS_COLOR_INDEX["MenuHilight"]: 0x030201}),
+        ("broadcast", WM_DWMCOLORIZATIONCOLORCHANGED, 0xFF336699, 1),
+        ("broadcast", WM_SETTINGCHANGE, 0, "ImmersiveColorSet"),
+    ]
+    assert "colorization_notify" in format_report(report)
+
+
+def test_failed_broadcast_falls_back_to_explorer_restart():
+    calls = StubWin32Calls(broadcast_ok=False)
+    report = RefreshEngine(calls).run({(ACCENT_KEY, "AccentPalette"): b"\0" * 32})
+    assert [(step, ok) for step, _, ok in report] == [("immersive_color_set", False), ("explorer_restart", True)]
+    assert calls.calls[-1] == ("restart_explorer",)
+    assert "(failed)" in format_report(report)
+
+
+def test_forced_restart_runs_once():
+    calls = StubWin32Calls(broadcast_ok=False)
+    report = RefreshEngine(calls).run({(ACCENT_KEY, "AccentPalette"): b"\0" * 32}, force_restart=True)
+    assert [step for step, _, _ in report] == ["immersive_color_set", "explorer_restart"]
+    assert calls.calls.count(("restart_explorer",)) == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from registry import (FakeRegistryBackend, RegistryBatch, read_values, HKEY_CURRENT_USER,
+                      ACCENT_KEY, DWM_KEY, PERSONALIZE_KEY, REG_DWORD, REG_BINARY)
+
+
+def make_backend():
+    return FakeRegistryBackend({
+        (HKEY_CURRENT_USER, DWM_KEY, "ColorizationColor"): (0x112233, REG_DWORD),
+        (HKEY_CURRENT_USER, DWM_KEY, "AccentColor"): (0x112233, REG_DWORD),
+        (HKEY_CURRENT_USER, ACCENT_KEY, "AccentColorMenu"): (0x112233, REG_DWORD),
+        (HKEY_CURRENT_USER, PERSONALIZE_KEY, "EnableTransparency"): (1, REG_DWORD),
+    })
+
+
+def test_commit_opens_each_key_once():
+    backend = make_backend()
+    batch = RegistryBatch(backend)
+    for name in ("ColorizationColor", "ColorizationAfterglow", "AccentColor"):
+        batch.set(DWM_KEY, name, REG_DWORD, 0x445566)
+    batch.set(ACCENT_KEY, "AccentColorMenu", REG_DWORD, 0x445566)
+    batch.set(ACCENT_KEY, "AccentPalette", REG_BINARY, bytes(32))
+
+    batch.commit()
+    assert backend.opens == 2
+    assert backend.writes == 5
+    assert backend.get(DWM_KEY, "ColorizationAfterglow") == (0x445566, REG_DWORD)
+
+
+def test_commit_skips_unchanged_values():
+    backend = make_backend()
+    batch = RegistryBatch(backend)
+    batch.set(DWM_KEY, "ColorizationColor", REG_DWORD, 0x112233)
+    batch.set(DWM_KEY, "AccentColor", REG_DWORD, 0x445566)
+    batch.set(PERSONALIZE_KEY, "EnableTransparency", REG_DWORD, 1)
+
+    changed = batch.commit()
+    assert changed == {(DWM_KEY, "AccentColor"): 0x445566}
+    assert backend.writes == 1
+    assert len(batch) == 0
+
+
+def test_repeated_commit_writes_nothing():
+    backend = make_backend()
+    for _ in range(2):
+        batch = RegistryBatch(backend)
+        batch.set(DWM_KEY, "ColorizationColor", REG_DWORD, 0x445566)
+        batch.commit()
+    assert backend.writes == 1
+
+
+def test_failed_write_rolls_back_earlier_writes():
+    backend = make_backend()
+    backend.fail_on = (ACCENT_KEY, "AccentColorMenu")
+    batch = RegistryBatch(backend)
+    batch.set(DWM_KEY, "ColorizationColor", REG_DWORD, 0x445566)
+    batch.set(DWM_KEY, "ColorizationAfterglow", REG_DWORD, 0x445566)
+    batch.set(ACCENT_KEY, "AccentColorMenu", REG_DWORD, 0x445566)
+
+    with pytest.raises(OSError):
+        batch.commit()
+    assert backend.get(DWM_KEY, "ColorizationColor") == (0x112233, REG_DWORD)
+    assert backend.get(DWM_KEY, "ColorizationAfterglow") is None  # created by the batch, so removed again
+    assert backend.get(ACCENT_KEY, "AccentColorMenu") == (0x112233, REG_DWORD)
+
+
+def test_delete_and_missing_values():
+    backend = make_backend()
+    batch = RegistryBatch(backend)
+    batch.delete(DWM_KEY, "AccentColor")
+    batch.delete(DWM_KEY, "NotThere")
+    assert batch.commit() == {(DWM_KEY, "AccentColor"): None}
+
+    values = read_values([(DWM_KEY, "AccentColor"), (DWM_KEY, "ColorizationColor"), ("Missing\\Key", "X")], backend)
+    assert values == {
+        (DWM_KEY, "AccentColor"): None,
+        (DWM_KEY, "ColorizationColor"): (0x112233, REG_DWORD),
+        ("Missing\\Key", "X"): None,
+    }
@@ -0,0 +1,56 @@
+import datetime
+
+from scheduler import Scheduler, parse_rules
+
+
+class FakeClock:
+    # wait() jumps straight to the deadline; jumps[] simulates suspends by
+    # moving the clock further than asked
+    def __init__(self, start, jumps=()):
+        self.now = start
+        self.jumps = list(jumps)
+        self.scheduler = None
+        self.waits = 0
+
+    def time(self):
+        return self.now
+
+    def wait(self, stop_event, timeout):
+        self.waits += 1
+        self.now += self.jumps.pop(0) if self.jumps else timeout
+        if self.scheduler and len(self.scheduler.applied) >= self.limit:
+            return True
+        return stop_event.is_set()
+
+
+def run_scheduler(clock, limit, catch_up=False):
+    config = {"rules": [{"at": "07:00", "preset": "light"}, {"at": "19:00", "preset": "dark"}]}
+    applied = []
+    sched = Scheduler(parse_rules(config), lambda name: applied.append((name, clock.time())), clock=clock)
+    sched.applied = applied
+    clock.scheduler = sched
+    clock.limit = limit
+    sched.run(catch_up=catch_up)
+    return applied
+
+
+def at(day, hour, minute=0):
+    return datetime.datetime(2024, 3, day, hour, minute).timestamp()
+
+
+def test_fires_each_switch_in_order():
+    applied = run_scheduler(FakeClock(at(1, 12)), limit=3)
+    assert [name for name, _ in applied] == ["dark", "light", "dark"]
+    assert [when for _, when in applied] == [at(1, 19), at(2, 7), at(2, 19)]
+
+
+def test_suspend_applies_only_the_latest_missed_switch():
+    # Asleep from 12:00 on day 1 until 08:00 on day 4: six switches missed
+    clock = FakeClock(at(1, 12), jumps=[at(4, 8) - at(1, 12)])
+    applied = run_scheduler(clock, limit=2)
+    assert applied == [("light", at(4, 8)), ("dark", at(4, 19))]
+
+
+def test_catch_up_applies_the_current_rule_on_start():
+    applied = run_scheduler(FakeClock(at(1, 22)), limit=2, catch_up=True)
+    assert applied == [("dark", at(1, 22)), ("light", at(2, 7))]
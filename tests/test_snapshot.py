@@ -0,0 +1,65 @@
+import snapshot
+from registry import FakeRegistryBackend, HKEY_CURRENT_USER, ACCENT_KEY, DWM_KEY, COLORS_KEY, PERSONALIZE_KEY, \
+    REG_DWORD, REG_SZ, REG_BINARY
+from snapshot import THEME_VALUES, WALLPAPER_VALUE, take_snapshot, encode, decode, diff, rollback
+
+
+def make_backend():
+    return FakeRegistryBackend({
+        (HKEY_CURRENT_USER, DWM_KEY, "ColorizationColor"): (0x336699, REG_DWORD),
+        (HKEY_CURRENT_USER, DWM_KEY, "AccentColor"): (0x336699, REG_DWORD),
+        (HKEY_CURRENT_USER, ACCENT_KEY, "AccentPalette"): (bytes(range(32)), REG_BINARY),
+        (HKEY_CURRENT_USER, PERSONALIZE_KEY, "EnableTransparency"): (1, REG_DWORD),
+        (HKEY_CURRENT_USER, COLORS_KEY, "Hilight"): ("51 102 153", REG_SZ),
+        (HKEY_CURRENT_USER, *WALLPAPER_VALUE): ("C:\\Wallpapers\\bäume.jpg", REG_SZ),
+    })
+
+
+def test_encode_decode_round_trip():
+    current = take_snapshot(make_backend())
+    assert len(current) == len(THEME_VALUES)
+    assert current[(COLORS_KEY, "MenuHilight")] is None
+    assert decode(encode(current)) == current
+    assert decode(encode({})) == {}
+
+
+def test_save_and_load(tmp_path):
+    current = take_snapshot(make_backend())
+    snapshot.save(current, tmp_path / "before.tss")
+    assert snapshot.load(tmp_path / "before.tss") == current
+
+
+def test_diff_only_reports_target_values_that_differ():
+    current = take_snapshot(make_backend())
+    target = {
+        (DWM_KEY, "ColorizationColor"): (0x336699, REG_DWORD),
+        (DWM_KEY, "AccentColor"): (0xFF0000, REG_DWORD),
+        (COLORS_KEY, "MenuHilight"): ("1 2 3", REG_SZ),
+    }
+    assert diff(current, target) == {
+        (DWM_KEY, "AccentColor"): ((0x336699, REG_DWORD), (0xFF0000, REG_DWORD)),
+        (COLORS_KEY, "MenuHilight"): (None, ("1 2 3", REG_SZ)),
+    }
+
+
+def test_rollback_writes_only_changed_values():
+    backend = make_backend()
+    before = take_snapshot(backend)
+    handle = backend.open_key(HKEY_CURRENT_USER, DWM_KEY, write=True)
+    backend.set_value(handle, "AccentColor", REG_DWORD, 0xFF0000)
+    handle = backend.open_key(HKEY_CURRENT_USER, COLORS_KEY, write=True)
+    backend.set_value(handle, "MenuHilight", REG_SZ, "1 2 3")
+    handle = backend.open_key(HKEY_CURRENT_USER, WALLPAPER_VALUE[0], write=True)
+    backend.set_value(handle, WALLPAPER_VALUE[1], REG_SZ, "C:\\other.jpg")
+    backend.reset_counters()
+
+    wallpapers = []
+    changed = rollback(before, backend, set_wallpaper=wallpapers.append)
+    assert sorted(changed) == [(COLORS_KEY, "MenuHilight"), (DWM_KEY, "AccentColor")]
+    assert backend.writes == 2
+    assert wallpapers == ["C:\\Wallpapers\\bäume.jpg"]
+    assert take_snapshot(backend)[(COLORS_KEY, "MenuHilight")] is None
+
+    backend.reset_counters()
+    assert rollback(before, backend) == {}
+    assert backend.writes == 0
@@ -0,0 +1,29 @@
+import pytest
+from PIL import Image
+
+import thumbnails
+from thumbnails import ThumbnailCache
+
+
+def make_wallpaper(path, size=(1920, 1080)):
+    Image.new("RGB", size, (40, 120, 200)).save(path, quality=90)
+    return str(path)
+
+
+def test_disk_hit_skips_the_decode(tmp_path, monkeypatch):
+    path = make_wallpaper(tmp_path / "wall.jpg")
+    assert ThumbnailCache(str(tmp_path / "thumbs")).get_image(path).size == (300, 169)
+
+    monkeypatch.setattr(thumbnails, "decode_thumbnail", lambda *a: pytest.fail("decoded the source again"))
+    assert ThumbnailCache(str(tmp_path / "thumbs")).get_image(path).size == (300, 169)
+
+
+def test_gallery_size_is_downscaled_from_the_preview(tmp_path, monkeypatch):
+    path = make_wallpaper(tmp_path / "wall.jpg")
+    preview = ThumbnailCache(str(tmp_path / "thumbs"))
+    preview.get_image(path)
+
+    monkeypatch.setattr(thumbnails, "decode_thumbnail", lambda *a: pytest.fail("decoded the source again"))
+    small = ThumbnailCache(str(tmp_path / "thumbs"), size=(64, 40), source=preview).get_image(path)
+    assert small.size == (64, 36)
+    assert small.getpixel((10, 10)) == pytest.approx((40, 120, 200), abs=3)
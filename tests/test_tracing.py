@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def no_trace():
+    yield
+    tracing.disable()
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "chrome"])
+def test_round_trip_through_summarize(tmp_path, fmt):
+    path = str(tmp_path / f"trace.{fmt}")
+    tracing.enable(path, fmt)
+    for i in range(4):
+        with tracing.span("apply", accent="#336699") as outer:
+            with tracing.span("apply.registry_commit"):
+                pass
+            outer.set(changed=i)
+    with pytest.raises(RuntimeError):
+        with tracing.span("apply.refresh"):
+            raise RuntimeError("broadcast timed out")
+    tracing.disable()
+
+    # A second process appending to the same file
+    tracing.enable(path, fmt)
+    with tracing.span("apply"):
+        pass
+    tracing.disable()
+
+    names = [name for name, _ in tracing.read_spans(path)]
+    assert names.count("apply") == 5 and names.count("apply.registry_commit") == 4
+    summary = tracing.summarize([path])
+    assert {name: row["count"] for name, row in summary.items()} == {
+        "apply": 5, "apply.registry_commit": 4, "apply.refresh": 1}
+    row = summary["apply"]
+    assert 0 <= row["p50"] <= row["p90"] <= row["p99"] <= row["max"]
+    assert "apply.registry_commit" in tracing.format_summary(summary)
+
+    with open(path) as file:
+        text = file.read()
+    if fmt == "chrome":
+        assert text.startswith("[\n") and text.count("[") == 1
+        assert json.loads(text.rstrip().rstrip(",") + "]")[0]["ph"] == "X"
+    else:
+        events = [json.loads(line) for line in text.splitlines()]
+        assert events[-2]["name"] == "apply.refresh" and events[-2]["error"] == "RuntimeError"
+        assert [e.get("changed") for e in events if e["name"] == "apply"] == [0, 1, 2, 3, None]
+
+
+def test_percentile_picks_the_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert tracing.percentile(values, 0.5) == 51.0
+    assert tracing.percentile(values, 0.99) == 99.0
+    assert tracing.percentile(values, 1.0) == 100.0
+    assert tracing.percentile([7.0], 0.9) == 7.0
+
+
+def test_disabled_span_is_the_shared_no_op():
+    assert not tracing.enabled()
+    assert tracing.span("apply") is tracing.NULL_SPAN
@@ -0,0 +1,92 @@
+import pytest
+
+from jobs import JobCancelled
+from refresh import StubWin32Calls
+from registry import FakeRegistryBackend, HKEY_CURRENT_USER, ACCENT_KEY, DWM_KEY, REG_DWORD, REG_BINARY
+from transition import TransitionPlayer, DWORD_VALUES, build_frames, frames_for
+
+
+START_PALETTE = bytes([0x10, 0x20, 0x30, 0xAA]) * 8
+END_PALETTE = bytes([0xF0, 0xE0, 0xD0, 0xAA]) * 8
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class CancelAfter:
+    # Stand-in for jobs.Job: cancelled once `frames` checks have passed
+    def __init__(self, frames):
+        self.frames = frames
+
+    def check(self):
+        if self.frames == 0:
+            raise JobCancelled("apply")
+        self.frames -= 1
+
+
+def make_backend():
+    values = {(HKEY_CURRENT_USER, path, name): (0x102030, REG_DWORD) for path, name in DWORD_VALUES}
+    values[(HKEY_CURRENT_USER, ACCENT_KEY, "AccentPalette")] = (START_PALETTE, REG_BINARY)
+    return FakeRegistryBackend(values)
+
+
+def make_player(backend, calls, fps=30):
+    clock = FakeClock()
+    return TransitionPlayer(backend, calls, fps=fps, clock=clock.time, sleep=clock.sleep)
+
+
+def test_build_frames_excludes_both_endpoints():
+    dwords, palettes = build_frames((0, 0, 0), (255, 255, 255), [(0, 0, 0)], [(255, 255, 255)], [0xAA], 10)
+    assert len(dwords) == len(palettes) == 9
+    assert 0 < dwords[0] < dwords[-1] < 0xFFFFFF
+    assert all(len(palette) == 4 and palette[3] == 0xAA for palette in palettes)
+    assert build_frames((0, 0, 0), (255, 255, 255), [(0, 0, 0)], [(255, 255, 255)], [0xAA], 1) == ([], [])
+
+
+def test_play_writes_every_frame_on_schedule():
+    backend = make_backend()
+    dwords, palettes = frames_for(0xF0E0D0, END_PALETTE, 8, backend)
+    backend.reset_counters()
+    report = make_player(backend, StubWin32Calls()).play(dwords, palettes)
+    assert report["frames"] == 7 and report["dropped"] == 0
+    assert backend.writes == report["writes"] == 7 * (len(DWORD_VALUES) + 1)
+    assert backend.get(DWM_KEY, "ColorizationColor")[0] == dwords[-1]
+
+
+def test_cancelled_fade_restores_start_values():
+    backend = make_backend()
+    calls = StubWin32Calls()
+    dwords, palettes = frames_for(0xF0E0D0, END_PALETTE, 10, backend)
+    with pytest.raises(JobCancelled):
+        make_player(backend, calls).play(dwords, palettes, job=CancelAfter(3))
+    for path, name in DWORD_VALUES:
+        assert backend.get(path, name) == (0x102030, REG_DWORD)
+    assert backend.get(ACCENT_KEY, "AccentPalette") == (START_PALETTE, REG_BINARY)
+    assert calls.calls[-1][2] == 0x102030 | 0xFF000000
+
+
+def test_failed_write_restores_start_values():
+    backend = make_backend()
+    dwords, palettes = frames_for(0xF0E0D0, END_PALETTE, 10, backend)
+    backend.fail_on = (ACCENT_KEY, "AccentPalette")
+    with pytest.raises(OSError):
+        make_player(backend, StubWin32Calls()).play(dwords, palettes)
+    assert backend.get(DWM_KEY, "ColorizationColor") == (0x102030, REG_DWORD)
+
+
+def test_cancel_before_first_frame_writes_nothing():
+    backend = make_backend()
+    calls = StubWin32Calls()
+    dwords, palettes = frames_for(0xF0E0D0, END_PALETTE, 10, backend)
+    backend.reset_counters()
+    with pytest.raises(JobCancelled):
+        make_player(backend, calls).play(dwords, palettes, job=CancelAfter(0))
+    assert backend.writes == 0 and calls.calls == []
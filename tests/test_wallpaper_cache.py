@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from PIL import Image
+
+from wallpaper_cache import WallpaperCache
+
+
+def make_wallpaper(path, color=(40, 120, 200), size=(1600, 900)):
+    Image.new("RGB", size, color).save(path, quality=90)
+    return str(path)
+
+
+def make_cache(tmp_path, resolution=(800, 450), **kwargs):
+    return WallpaperCache(str(tmp_path / "cache"), resolution=resolution,
+                          resolution_fn=lambda: pytest.fail("queried the monitor"), **kwargs)
+
+
+def test_lookup_is_none_until_prepared(tmp_path):
+    source = make_wallpaper(tmp_path / "a.jpg")
+    cache = make_cache(tmp_path)
+    assert cache.lookup(source) is None
+    entry = cache.prepare(source)
+    assert cache.lookup(source) == entry
+    with Image.open(entry) as img:
+        assert img.size == (800, 450)
+
+
+def test_repeat_prepare_is_a_hit(tmp_path, monkeypatch):
+    source = make_wallpaper(tmp_path / "a.jpg")
+    cache = make_cache(tmp_path)
+    entry = cache.prepare(source)
+
+    monkeypatch.setattr(WallpaperCache, "_convert", lambda *a: pytest.fail("converted again"))
+    assert cache.prepare(source) == entry
+    assert make_cache(tmp_path).prepare(source) == entry  # also after a restart
+
+
+def test_key_follows_resolution_and_content(tmp_path):
+    source = make_wallpaper(tmp_path / "a.jpg")
+    copy = make_wallpaper(tmp_path / "copy.jpg")
+    entry = make_cache(tmp_path).prepare(source)
+
+    assert make_cache(tmp_path).prepare(copy) == entry  # same bytes, same entry
+    assert make_cache(tmp_path, resolution=(400, 225)).prepare(source) != entry
+
+    make_wallpaper(source, color=(200, 40, 40))  # edited in place
+    os.utime(source, ns=(1, 1))
+    assert make_cache(tmp_path).lookup(source) is None
+    assert make_cache(tmp_path).prepare(source) != entry
+
+
+def test_evict_removes_the_oldest_and_keeps_the_new_entry(tmp_path):
+    sources = [make_wallpaper(tmp_path / f"{i}.jpg", color=(i * 60, 0, 0)) for i in range(3)]
+    cache = make_cache(tmp_path)
+    entries = [cache.prepare(source) for source in sources]
+    for age, entry in enumerate(entries):
+        os.utime(entry, (1000 + age, 1000 + age))
+
+    # Room for about two entries: adding a fourth drops the two oldest
+    cache.max_bytes = max(os.path.getsize(entry) for entry in entries) * 2 + 1
+    newest = cache.prepare(make_wallpaper(tmp_path / "new.jpg", color=(0, 200, 0)))
+    assert os.path.exists(newest)
+    assert [os.path.exists(entry) for entry in entries] == [False, False, True]
+
+
+def test_new_entry_is_kept_even_if_it_alone_is_too_big(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=1)
+    old = cache.prepare(make_wallpaper(tmp_path / "a.jpg"))
+    new = cache.prepare(make_wallpaper(tmp_path / "b.jpg", color=(0, 200, 0)))
+    assert not os.path.exists(old) and os.path.exists(new)
@@ -0,0 +1,99 @@
+import queue
+
+from registry import FakeRegistryBackend, RegistryBatch, HKEY_CURRENT_USER, DWM_KEY, PERSONALIZE_KEY, REG_DWORD
+from snapshot import THEME_VALUES
+from watcher import ThemeWatcher, FakeNotifier
+
+
+def start_watcher(backend):
+    reports = queue.Queue()
+    paths = sorted({path for path, _ in THEME_VALUES})
+    watcher = ThemeWatcher(lambda changes, current: reports.put((changes, current)),
+                           FakeNotifier(backend, paths), backend, debounce=0.05)
+    watcher.start()
+    watcher.ready.wait(5)
+    return watcher, reports
+
+
+def write(backend, values):
+    batch = RegistryBatch(backend)
+    for (path, name), (value, value_type) in values.items():
+        batch.set(path, name, value_type, value)
+    batch.commit()
+
+
+def test_external_change_is_reported_with_the_snapshot():
+    backend = FakeRegistryBackend({(HKEY_CURRENT_USER, DWM_KEY, "AccentColor"): (0x112233, REG_DWORD)})
+    watcher, reports = start_watcher(backend)
+    try:
+        write(backend, {(DWM_KEY, "AccentColor"): (0x445566, REG_DWORD)})
+        changes, current = reports.get(timeout=5)
+        assert changes == {(DWM_KEY, "AccentColor"): ((0x112233, REG_DWORD), (0x445566, REG_DWORD))}
+        assert current[(DWM_KEY, "AccentColor")] == (0x445566, REG_DWORD)
+    finally:
+        watcher.stop()
+
+
+def test_expected_writes_are_not_reported():
+    backend = FakeRegistryBackend()
+    watcher, reports = start_watcher(backend)
+    try:
+        own = {(DWM_KEY, "AccentColor"): (0x445566, REG_DWORD), (PERSONALIZE_KEY, "ColorPrevalence"): (1, REG_DWORD)}
+        watcher.expect(own)
+        write(backend, own)
+        # Only the outside change that follows comes through
+        write(backend, {(PERSONALIZE_KEY, "EnableTransparency"): (0, REG_DWORD)})
+        changes, _ = reports.get(timeout=5)
+        assert list(changes) == [(PERSONALIZE_KEY, "EnableTransparency")]
+        assert reports.empty()
+
+        # An expectation is used up once seen, so Settings setting the same
+        # value back after a change is still reported
+        write(backend, {(DWM_KEY, "AccentColor"): (0x112233, REG_DWORD)})
+        reports.get(timeout=5)
+        write(backend, {(DWM_KEY, "AccentColor"): (0x445566, REG_DWORD)})
+        changes, _ = reports.get(timeout=5)
+        assert list(changes) == [(DWM_KEY, "AccentColor")]
+    finally:
+        watcher.stop()
+
+
+def test_unexpected_value_on_an_expected_key_is_reported():
+    backend = FakeRegistryBackend()
+    watcher, reports = start_watcher(backend)
+    try:
+        watcher.expect({(DWM_KEY, "AccentColor"): (0x445566, REG_DWORD)})
+        write(backend, {(DWM_KEY, "AccentColor"): (0x778899, REG_DWORD)})
+        changes, _ = reports.get(timeout=5)
+        assert changes[(DWM_KEY, "AccentColor")][1] == (0x778899, REG_DWORD)
+    finally:
+        watcher.stop()
+
+
+def test_expectation_for_an_unchanged_value_is_not_kept():
+    # A no-op apply expects ColorPrevalence=1 while it already is 1; the
+    # batch never writes it, so the expectation must not linger and hide a
+    # later change back to 1 made in Settings
+    backend = FakeRegistryBackend({(HKEY_CURRENT_USER, PERSONALIZE_KEY, "ColorPrevalence"): (1, REG_DWORD)})
+    watcher, reports = start_watcher(backend)
+    try:
+        watcher.expect({(PERSONALIZE_KEY, "ColorPrevalence"): (1, REG_DWORD)})
+        write(backend, {(PERSONALIZE_KEY, "ColorPrevalence"): (0, REG_DWORD)})
+        assert reports.get(timeout=5)[0][(PERSONALIZE_KEY, "ColorPrevalence")][1] == (0, REG_DWORD)
+        write(backend, {(PERSONALIZE_KEY, "ColorPrevalence"): (1, REG_DWORD)})
+        assert reports.get(timeout=5)[0][(PERSONALIZE_KEY, "ColorPrevalence")][1] == (1, REG_DWORD)
+    finally:
+        watcher.stop()
+
+
+def test_forget_drops_the_expectations_of_a_failed_apply():
+    backend = FakeRegistryBackend()
+    watcher, reports = start_watcher(backend)
+    try:
+        own = {(DWM_KEY, "AccentColor"): (0x445566, REG_DWORD)}
+        watcher.expect(own)
+        watcher.forget(own)
+        write(backend, own)
+        assert list(reports.get(timeout=5)[0]) == [(DWM_KEY, "AccentColor")]
+    finally:
+        watcher.stop()
@@ -0,0 +1,183 @@
+# Core theme functions with no GUI dependencies. Imported by the Tk app and
+# by the command line entry point, which must not pay for Tk or Pillow.
+import ctypes
+import os
+
+from registry import (RegistryBatch, ACCENT_KEY, PERSONALIZE_KEY, DWM_KEY,
+                      REG_DWORD, REG_BINARY)
+from refresh import RefreshEngine
+from color import hex_to_bgr, reverse_hex, palette_entry
+import snapshot
+from tracing import span
+from wallpaper_cache import WallpaperCache, parse_resolution
+
+
+class NullJob:
+    # Stand-in for jobs.Job when applying outside the job queue
+    def check(self):
+        pass
+
+    def progress(self, stage):
+        pass
+
+    def notify(self, stage):
+        pass
+
+
+# --- Core Theme Functions ---
+
+def stage_accent_color(batch, hex_color):
+    bgr_color_value = hex_to_bgr(hex_color)
+    batch.set(ACCENT_KEY, "AccentColorMenu", REG_DWORD, bgr_color_value)
+    batch.set(PERSONALIZE_KEY, "ColorPrevalence", REG_DWORD, 1)
+    batch.set(DWM_KEY, "ColorizationColor", REG_DWORD, bgr_color_value)
+    batch.set(DWM_KEY, "ColorizationAfterglow", REG_DWORD, bgr_color_value)
+    batch.set(DWM_KEY, "AccentColor", REG_DWORD, bgr_color_value)
+
+def build_accent_palette(accent_color, optional_colors):
+    # Five optional entries, then the accent three times - always 32 bytes.
+    # Missing optional colors are written as unset.
+    main_bytes = palette_entry(accent_color)
+    optional_colors = (list(optional_colors) + [""] * 5)[:5]
+    return b"".join(palette_entry(color) for color in optional_colors) + main_bytes * 3
+
+def stage_accent_palette(batch, accent_color, optional_colors):
+    batch.set(ACCENT_KEY, "AccentPalette", REG_BINARY, build_accent_palette(accent_color, optional_colors))
+
+refresh_engine = RefreshEngine()
+
+# Core functions raise on failure; callers decide how to report errors.
+
+def set_accent_color(hex_color, batch=None):
+    # With a batch the values are only staged; the caller commits and refreshes.
+    if batch is not None:
+        stage_accent_color(batch, hex_color)
+        return {}
+    batch = RegistryBatch()
+    stage_accent_color(batch, hex_color)
+    changed = batch.commit()
+    refresh_engine.run(changed)
+    return changed
+
+def set_accent_palette(accent_color, optional_colors, batch=None):
+    if batch is not None:
+        stage_accent_palette(batch, accent_color, optional_colors)
+        return {}
+    batch = RegistryBatch()
+    stage_accent_palette(batch, accent_color, optional_colors)
+    changed = batch.commit()
+    refresh_engine.run(changed)
+    return changed
+
+def set_wallpaper(image_path):
+    if not ctypes.windll.user32.SystemParametersInfoW(20, 0, image_path, 3):
+        raise ctypes.WinError()
+
+_wallpaper_cache = None
+
+def wallpaper_cache():
+    # THEME_WALLPAPER_RESOLUTION=3840x2160 overrides monitor detection
+    global _wallpaper_cache
+    if _wallpaper_cache is None:
+        resolution = os.environ.get("THEME_WALLPAPER_RESOLUTION")
+        _wallpaper_cache = WallpaperCache(os.path.join(os.getcwd(), ".wallpaper_cache"),
+                                          resolution=parse_resolution(resolution) if resolution else None)
+    return _wallpaper_cache
+
+def prepare_wallpaper(image_path):
+    # Falls back to the original file if it cannot be converted
+    try:
+        return wallpaper_cache().prepare(image_path)
+    except Exception as e:
+        print(f"Using original wallpaper {image_path}:", e)
+        return image_path
+
+def play_transition(batch, accent_color, optional_colors, steps, fps, job):
+    # Animates from the current accent towards the target; the final frame is
+    # left to the normal commit so the refresh sees every changed value
+    from transition import TransitionPlayer, frames_for  # needs NumPy
+
+    target_dword = hex_to_bgr(reverse_hex(accent_color))
+    target_palette = build_accent_palette(accent_color, optional_colors)
+    dwords, palettes = frames_for(target_dword, target_palette, steps, batch.backend, batch.hive)
+    player = TransitionPlayer(batch.backend, refresh_engine.calls, batch.hive, fps)
+    return player.play(dwords, palettes, job)
+
+APPLY_COMPONENTS = ("accent", "palette", "wallpaper")
+
+def apply_theme(accent_color, optional_colors, wallpaper, batch=None, job=None,
+                transition_steps=0, transition_fps=30, snapshot_path=None, components=APPLY_COMPONENTS):
+    # Returns the refresh report. A superseded job may stop before the
+    # registry commit, but once values are written the refresh always runs.
+    # With snapshot_path the previous theme is saved there first; components
+    # limits the apply to a subset of APPLY_COMPONENTS.
+    job = job or NullJob()
+    batch = batch if batch is not None else RegistryBatch()
+    with span("apply", accent=accent_color, wallpaper=bool(wallpaper)) as apply_span:
+        if snapshot_path:
+            with span("apply.snapshot"):
+                snapshot.save(snapshot.take_snapshot(batch.backend, batch.hive), snapshot_path)
+
+        if wallpaper and "wallpaper" in components:
+            job.progress("Setting wallpaper...")
+            with span("apply.prepare_wallpaper"):
+                prepared = prepare_wallpaper(wallpaper)
+            with span("apply.set_wallpaper"):
+                set_wallpaper(prepared)
+
+        job.progress("Writing registry...")
+        if accent_color and transition_steps > 1 and "accent" in components:
+            job.progress("Transitioning...")
+            with span("apply.transition", steps=transition_steps):
+                play_transition(batch, accent_color, optional_colors, transition_steps, transition_fps, job)
+        if accent_color and "accent" in components:
+            set_accent_color(reverse_hex(accent_color), batch=batch)
+        if accent_color and "palette" in components:
+            set_accent_palette(accent_color, optional_colors, batch=batch)
+        with span("apply.registry_commit") as commit_span:
+            changed = batch.commit()
+            commit_span.set(changed=len(changed))
+
+        job.notify("Refreshing...")
+        with span("apply.refresh"):
+            report = refresh_engine.run(changed)
+        apply_span.set(changed=len(changed))
+        return report
+
+def restore_snapshot(saved, backend=None, job=None):
+    # Rolls the theme back to a snapshot, writing only what differs
+    job = job or NullJob()
+    job.progress("Restoring theme...")
+    changed = snapshot.rollback(saved, backend, set_wallpaper=set_wallpaper)
+    job.notify("Refreshing...")
+    return refresh_engine.run(changed)
+
+# --- Presets ---
+
+def validate_preset(preset):
+    # Returns (accent_color, optional_colors, wallpaper) or raises ValueError
+    accent_color = (preset.get("accent_color") or "").strip()
+    wallpaper = (preset.get("wallpaper") or "").strip()
+    optional_colors = list(preset.get("optional_colors") or [""] * 5)
+    optional_colors = (optional_colors + [""] * 5)[:5]
+
+    if not accent_color or len(accent_color) != 7 or not accent_color.startswith("#"):
+        raise ValueError("Invalid accent color in preset.")
+    return accent_color, optional_colors, wallpaper
+
+def preset_values(accent_color, optional_colors):
+    # The registry values an apply would write: {(path, name): (value, type)}
+    batch = RegistryBatch()
+    set_accent_color(reverse_hex(accent_color), batch=batch)
+    set_accent_palette(accent_color, optional_colors, batch=batch)
+    return {(path, name): entry for path, values in batch.pending.items() for name, entry in values.items()}
+
+def load_preset(store, name):
+    preset = store.get(name)
+    if preset is None:
+        raise KeyError(f"Preset not found: {name}")
+    return preset
+
+def apply_preset(store, name, batch=None, job=None, **options):
+    accent_color, optional_colors, wallpaper = validate_preset(load_preset(store, name))
+    return apply_theme(accent_color, optional_colors, wallpaper, batch=batch, job=job, **options)
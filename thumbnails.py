@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from tracing import span
+
+
+THUMBNAIL_SIZE = (300, 200)
+
+
+def thumbnail_key(path):
+    # A wallpaper edited in place gets a new mtime/size and so a new entry
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    with Image.open(path) as img:
+        if img.format == "JPEG":
+            # Let libjpeg scale by 1/2..1/8 while decoding, so a large JPEG is
+            # never decoded at full resolution
+            img.draft("RGB", size)
+        else:
+            factor = min(img.width // size[0], img.height // size[1])
+            if factor >= 2:
+                img = img.reduce(factor)
+        img.thumbnail(size)
+        return img.convert("RGB")
+
+
+class ThumbnailCache:
+    # Two layers: an LRU of PhotoImage objects for the running session and a
+    # directory of small PNGs that survives restarts. With a source cache of
+    # a larger size, misses are downscaled from its thumbnail instead of
+    # decoding the wallpaper again.
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE, memory_entries=32, source=None):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory_entries = memory_entries
+        self.source = source
+        self.photos = OrderedDict()
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr((key, self.size)).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".png")
+
+    def get_image(self, path):
+        # Returns a PIL image, decoding the source only on a disk miss
+        disk_path = self._disk_path(thumbnail_key(path))
+        if os.path.exists(disk_path):
+            try:
+                with Image.open(disk_path) as img:
+                    img.load()
+                    return img
+            except OSError:
+                pass  # Truncated or corrupt entry - rebuild it
+
+        if self.source is not None:
+            img = self.source.get_image(path).copy()
+            img.thumbnail(self.size)
+        else:
+            with span("thumbnail.decode"):
+                img = decode_thumbnail(path, self.size)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{disk_path}.{threading.get_ident()}.tmp"  # the gallery and preview may race
+        img.save(tmp_path, "PNG")
+        os.replace(tmp_path, disk_path)
+        return img
+
+    def get_photo(self, path):
+        # Tk objects must be created on the Tk thread. Decodes on a miss; use
+        # cached_photo/put_photo to keep the decode on a worker.
+        photo = self.cached_photo(path)
+        if photo is None:
+            photo = self.put_photo(path, self.get_image(path))
+        return photo
+
+    def cached_photo(self, path):
+        key = thumbnail_key(path)
+        photo = self.photos.get(key)
+        if photo is not None:
+            self.photos.move_to_end(key)
+        return photo
+
+    def put_photo(self, path, img):
+        # Tk thread only; img comes from get_image
+        from PIL import ImageTk
+
+        photo = ImageTk.PhotoImage(img)
+        self.photos[thumbnail_key(path)] = photo
+        while len(self.photos) > self.memory_entries:
+            self.photos.popitem(last=False)
+        return photo
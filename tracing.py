@@ -0,0 +1,152 @@
+# Span instrumentation for the apply path. Disabled unless THEME_TRACE
+# names an output file; while disabled span() returns a shared no-op
+# context manager, so instrumented code pays one global lookup per span.
+#
+#   THEME_TRACE=C:\traces\apply.jsonl         JSON lines (default)
+#   THEME_TRACE_FORMAT=chrome                 Chrome trace event format
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+_writer = None
+
+
+class Span:
+    def __init__(self, writer, name, attrs):
+        self.writer = writer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start_wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.writer.write(self.name, self.start_wall, duration, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class TraceWriter:
+    def __init__(self, path, fmt="jsonl"):
+        if fmt not in ("jsonl", "chrome"):
+            raise ValueError(f"Unknown trace format: {fmt}")
+        self.fmt = fmt
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", buffering=1)
+        if fmt == "chrome" and new_file:
+            # Chrome and Perfetto accept an array without the closing bracket,
+            # which lets every process append to the same file
+            self.file.write("[\n")
+
+    def write(self, name, start, duration, attrs):
+        if self.fmt == "chrome":
+            event = {"name": name, "ph": "X", "ts": int(start * 1e6), "dur": int(duration * 1e6),
+                     "pid": self.pid, "tid": threading.get_ident(), "args": attrs}
+            line = json.dumps(event) + ",\n"
+        else:
+            event = {"name": name, "ts": start, "dur_ms": duration * 1000, "pid": self.pid,
+                     "tid": threading.get_ident()}
+            event.update(attrs)
+            line = json.dumps(event) + "\n"
+        with self.lock:
+            self.file.write(line)
+
+    def close(self):
+        self.file.close()
+
+
+def enable(path, fmt="jsonl"):
+    global _writer
+    disable()
+    _writer = TraceWriter(path, fmt)
+
+def disable():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+def enabled():
+    return _writer is not None
+
+def span(name, **attrs):
+    if _writer is None:
+        return NULL_SPAN
+    return Span(_writer, name, attrs)
+
+
+# --- Report ---
+
+def read_spans(path):
+    # Yields (name, duration ms) from either output format
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip().rstrip(",")
+            if not line or line in ("[", "]"):
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if "dur_ms" in event:
+                yield event["name"], event["dur_ms"]
+            elif event.get("ph") == "X":
+                yield event["name"], event["dur"] / 1000
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def summarize(paths):
+    # {span name: {"count", "p50", "p90", "p99", "max"}} in milliseconds
+    durations = {}
+    for path in paths:
+        for name, duration in read_spans(path):
+            durations.setdefault(name, []).append(duration)
+
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50": percentile(values, 0.50),
+            "p90": percentile(values, 0.90),
+            "p99": percentile(values, 0.99),
+            "max": values[-1],
+        }
+    return summary
+
+def format_summary(summary):
+    lines = [f"{'span':<32}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for name, row in sorted(summary.items(), key=lambda item: -item[1]["p50"] * item[1]["count"]):
+        lines.append(f"{name:<32}{row['count']:>8}{row['p50']:>10.2f}{row['p90']:>10.2f}"
+                     f"{row['p99']:>10.2f}{row['max']:>10.2f}")
+    return "\n".join(lines)
+
+
+if os.environ.get("THEME_TRACE"):
+    enable(os.environ["THEME_TRACE"], os.environ.get("THEME_TRACE_FORMAT", "jsonl"))
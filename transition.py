@@ -0,0 +1,171 @@
+import time
+
+import numpy as np
+
+from registry import default_backend, read_values, HKEY_CURRENT_USER, ACCENT_KEY, DWM_KEY, REG_DWORD, REG_BINARY
+from refresh import Win32Calls, WM_DWMCOLORIZATIONCOLORCHANGED
+
+
+DWORD_VALUES = [(DWM_KEY, "ColorizationColor"), (DWM_KEY, "ColorizationAfterglow"),
+                (DWM_KEY, "AccentColor"), (ACCENT_KEY, "AccentColorMenu")]
+
+
+# --- OKLab ---
+
+def srgb_to_oklab(rgb):
+    # rgb: (..., 3) array of 0-255 values
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    lms = linear @ np.array([[0.4122214708, 0.2119034982, 0.0883024619],
+                             [0.5363325363, 0.6806995451, 0.2817188376],
+                             [0.0514459929, 0.1073969566, 0.6299787005]])
+    return np.cbrt(lms) @ np.array([[0.2104542553, 1.9779984951, 0.0259040371],
+                                    [0.7936177850, -2.4285922050, 0.7827717662],
+                                    [-0.0040720468, 0.4505937099, -0.8086757660]])
+
+def oklab_to_srgb(lab):
+    lms = lab @ np.array([[1.0, 1.0, 1.0],
+                          [0.3963377774, -0.1055613458, -0.0894841775],
+                          [0.2158037573, -0.0638541728, -1.2914855480]])
+    linear = (lms ** 3) @ np.array([[4.0767416621, -1.2684380046, -0.0041960863],
+                                    [-3.3077115913, 2.6097574011, -0.7034186147],
+                                    [0.2309699292, -0.3413193965, 1.7076147010]])
+    linear = np.clip(linear, 0.0, 1.0)
+    c = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return np.clip(np.rint(c * 255.0), 0, 255).astype(np.uint8)
+
+
+# --- Frame Generation ---
+
+def dword_to_rgb(value):
+    # Inverse of hex_to_bgr(reverse_hex(color)) as written by set_accent_color
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+def blob_to_rgb(palette):
+    entries = np.frombuffer(palette, dtype=np.uint8).reshape(-1, 4)
+    return entries[:, :3], entries[:, 3]
+
+def build_frames(start_color, end_color, start_palette, end_palette, alpha, steps):
+    # Intermediate frames only - the last step is the target itself and is
+    # written by the regular apply. Returns (dwords, palette blobs), both
+    # ready to hand to SetValueEx.
+    t = np.linspace(0.0, 1.0, steps + 1)[1:-1, None]
+    if not len(t):
+        return [], []
+
+    color_lab = srgb_to_oklab(np.stack([start_color, end_color]))
+    palette_lab = srgb_to_oklab(np.stack([start_palette, end_palette]))
+    frame_colors = oklab_to_srgb(color_lab[0] + (color_lab[1] - color_lab[0]) * t).astype(np.uint32)
+    frame_palettes = oklab_to_srgb(palette_lab[0] + (palette_lab[1] - palette_lab[0]) * t[:, :, None])
+
+    dwords = (frame_colors[:, 0] << 16) | (frame_colors[:, 1] << 8) | frame_colors[:, 2]
+    blobs = np.empty(frame_palettes.shape[:2] + (4,), dtype=np.uint8)
+    blobs[:, :, :3] = frame_palettes
+    blobs[:, :, 3] = alpha
+    return [int(value) for value in dwords], [frame.tobytes() for frame in blobs]
+
+def frames_for(target_dword, target_palette, steps, backend=None, hive=HKEY_CURRENT_USER):
+    # Starts from whatever is in the registry now
+    current = read_values([(DWM_KEY, "ColorizationColor"), (ACCENT_KEY, "AccentPalette")], backend, hive)
+    start_dword = current[(DWM_KEY, "ColorizationColor")]
+    start_palette = current[(ACCENT_KEY, "AccentPalette")]
+    start_dword = start_dword[0] if start_dword else target_dword
+    if not start_palette or len(start_palette[0]) != len(target_palette):
+        start_palette = (target_palette, REG_BINARY)
+
+    end_rgb, alpha = blob_to_rgb(target_palette)
+    start_rgb, _ = blob_to_rgb(start_palette[0])
+    return build_frames(dword_to_rgb(start_dword), dword_to_rgb(target_dword), start_rgb, end_rgb, alpha, steps)
+
+
+# --- Streaming ---
+
+class TransitionPlayer:
+    # Writes precomputed frames at a fixed rate through already-open keys.
+    # Frames that fall behind schedule are dropped rather than queued, and
+    # values equal to the previous frame are not rewritten. Frames bypass
+    # RegistryBatch, so a cancelled or failed fade puts the start values back
+    # itself instead of leaving a blended color behind.
+    def __init__(self, backend=None, calls=None, hive=HKEY_CURRENT_USER, fps=30,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.backend = backend
+        self.calls = calls or Win32Calls()
+        self.hive = hive
+        self.fps = fps
+        self.clock = clock
+        self.sleep = sleep
+
+    def play(self, dwords, palettes, job=None):
+        backend = self.backend or default_backend()
+        interval = 1.0 / self.fps
+        handles = {path: backend.open_key(self.hive, path, write=True) for path in (DWM_KEY, ACCENT_KEY)}
+        start_values = {(path, name): self._query(backend, handles[path], name)
+                        for path, name in DWORD_VALUES + [(ACCENT_KEY, "AccentPalette")]}
+        written = dropped = writes = 0
+        last_dword = last_palette = None
+        start = self.clock()
+        try:
+            index = 0
+            while index < len(dwords):
+                if job is not None:
+                    job.check()
+                delay = start + index * interval - self.clock()
+                if delay > 0:
+                    self.sleep(delay)
+                elif delay < -interval:
+                    # Behind by more than a frame - skip to the one due now
+                    skip = min(int(-delay / interval), len(dwords) - 1 - index)
+                    dropped += skip
+                    index += skip
+
+                dword, palette = dwords[index], palettes[index]
+                if dword != last_dword:
+                    for path, name in DWORD_VALUES:
+                        backend.set_value(handles[path], name, REG_DWORD, dword)
+                    writes += len(DWORD_VALUES)
+                    self.calls.broadcast(WM_DWMCOLORIZATIONCOLORCHANGED, dword | 0xFF000000, 1, 50)
+                    last_dword = dword
+                if palette != last_palette:
+                    backend.set_value(handles[ACCENT_KEY], "AccentPalette", REG_BINARY, palette)
+                    writes += 1
+                    last_palette = palette
+                written += 1
+                index += 1
+        except BaseException:
+            self._restore(backend, handles, start_values)
+            raise
+        finally:
+            for handle in handles.values():
+                backend.close_key(handle)
+
+        elapsed = self.clock() - start
+        return {
+            "frames": written,
+            "dropped": dropped,
+            "writes": writes,
+            "seconds": elapsed,
+            "fps": written / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _query(self, backend, handle, name):
+        try:
+            return tuple(backend.query_value(handle, name))
+        except FileNotFoundError:
+            return None
+
+    def _restore(self, backend, handles, start_values):
+        restored = False
+        for (path, name), entry in start_values.items():
+            try:
+                if self._query(backend, handles[path], name) == entry:
+                    continue
+                if entry is None:
+                    backend.delete_value(handles[path], name)
+                else:
+                    backend.set_value(handles[path], name, entry[1], entry[0])
+                restored = True
+            except Exception as e:
+                print(f"Failed to restore {path}\\{name} after an interrupted transition:", e)
+        colorization = start_values[(DWM_KEY, "ColorizationColor")]
+        if restored and colorization is not None:
+            self.calls.broadcast(WM_DWMCOLORIZATIONCOLORCHANGED, colorization[0] | 0xFF000000, 1, 50)
@@ -0,0 +1,130 @@
+import ctypes
+import hashlib
+import json
+import os
+import threading
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+
+def detect_resolution():
+    # Physical pixels of the primary monitor, independent of DPI awareness
+    user32 = ctypes.windll.user32
+    gdi32 = ctypes.windll.gdi32
+    hdc = user32.GetDC(0)
+    try:
+        return gdi32.GetDeviceCaps(hdc, 118), gdi32.GetDeviceCaps(hdc, 117)  # DESKTOPHORZRES, DESKTOPVERTRES
+    finally:
+        user32.ReleaseDC(0, hdc)
+
+def parse_resolution(text):
+    width, height = (int(part) for part in text.lower().split("x"))
+    return width, height
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WallpaperCache:
+    # Wallpapers scaled once to the screen resolution and stored by content
+    # hash + resolution, so applying the same image again is a file lookup.
+    # The least recently used files are evicted past max_bytes.
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, resolution=None, resolution_fn=detect_resolution):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.resolution = resolution
+        self.resolution_fn = resolution_fn
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(cache_dir, "hashes.json")
+        self._hashes = None
+
+    def target_resolution(self):
+        if self.resolution is None:
+            self.resolution = tuple(self.resolution_fn())
+        return self.resolution
+
+    # --- Source Hashes ---
+    # Hashing a 60 MB source on every apply would cost more than the cache
+    # saves, so hashes are remembered per path + mtime + size.
+
+    def _load_hashes(self):
+        if self._hashes is None:
+            try:
+                with open(self.index_path, "r") as file:
+                    self._hashes = json.load(file)
+            except (OSError, ValueError):
+                self._hashes = {}
+        return self._hashes
+
+    def source_hash(self, path):
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+        hashes = self._load_hashes()
+        if key not in hashes:
+            prefix = os.path.abspath(path) + "|"
+            for stale in [k for k in hashes if k.startswith(prefix)]:
+                del hashes[stale]
+            hashes[key] = file_hash(path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(hashes, file)
+            os.replace(tmp_path, self.index_path)
+        return hashes[key]
+
+    # --- Cache Entries ---
+
+    def _entry_path(self, path):
+        width, height = self.target_resolution()
+        return os.path.join(self.cache_dir, f"{self.source_hash(path)[:32]}_{width}x{height}.jpg")
+
+    def lookup(self, path):
+        # Cached file for a source if it has been prepared before, else None
+        with self.lock:
+            entry = self._entry_path(path)
+        return entry if os.path.exists(entry) else None
+
+    def prepare(self, path):
+        with self.lock:
+            entry = self._entry_path(path)
+            if os.path.exists(entry):
+                os.utime(entry)  # mtime doubles as the LRU timestamp
+                return entry
+            self._convert(path, entry)
+            self._evict(keep=entry)
+            return entry
+
+    def _convert(self, path, entry):
+        from PIL import Image  # only needed on a miss
+
+        width, height = self.target_resolution()
+        with Image.open(path) as img:
+            img.draft("RGB", (width, height))  # JPEG: decode at the smallest scale that still covers the screen
+            scale = max(width / img.width, height / img.height)
+            if scale < 1:
+                img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                                 Image.LANCZOS)
+            tmp_path = entry + ".tmp"
+            img.convert("RGB").save(tmp_path, "JPEG", quality=95, optimize=True)
+        os.replace(tmp_path, entry)
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".jpg"):
+                full = os.path.join(self.cache_dir, name)
+                st = os.stat(full)
+                entries.append((st.st_mtime, st.st_size, full))
+        total = sum(size for _, size, _ in entries)
+        for _, size, full in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if full != keep:
+                os.remove(full)
+                total -= size
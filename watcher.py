@@ -0,0 +1,179 @@
+import ctypes
+import threading
+
+from registry import HKEY_CURRENT_USER, default_backend
+from snapshot import THEME_VALUES, take_snapshot, diff
+
+
+CHANGED = "changed"
+TIMEOUT = "timeout"
+STOPPED = "stopped"
+
+WAIT_OBJECT_0 = 0
+WAIT_TIMEOUT = 0x102
+INFINITE = 0xFFFFFFFF
+KEY_NOTIFY = 0x0010
+REG_NOTIFY_CHANGE_NAME = 0x1
+REG_NOTIFY_CHANGE_LAST_SET = 0x4
+
+
+# --- Notifiers ---
+# wait(timeout) blocks until a watched key changes, the timeout expires or
+# stop() is called, and returns CHANGED, TIMEOUT or STOPPED.
+
+class WinregNotifier:
+    # RegNotifyChangeKeyValue on every watched key plus a stop event, all in
+    # one WaitForMultipleObjects - the thread sleeps in the kernel while idle
+    def __init__(self, paths, hive=HKEY_CURRENT_USER):
+        import winreg
+
+        self.kernel32 = ctypes.windll.kernel32
+        self.advapi32 = ctypes.windll.advapi32
+        self.keys = []
+        for path in paths:
+            try:
+                self.keys.append(winreg.OpenKey(hive, path, 0, KEY_NOTIFY))
+            except FileNotFoundError:
+                pass
+        self.events = [self.kernel32.CreateEventW(None, False, False, None) for _ in self.keys]
+        self.stop_event = self.kernel32.CreateEventW(None, True, False, None)
+        self.handles = (ctypes.c_void_p * (len(self.events) + 1))(*self.events, self.stop_event)
+        for index in range(len(self.keys)):
+            self._arm(index)
+
+    def _arm(self, index):
+        result = self.advapi32.RegNotifyChangeKeyValue(
+            ctypes.c_void_p(int(self.keys[index])), False,
+            REG_NOTIFY_CHANGE_NAME | REG_NOTIFY_CHANGE_LAST_SET, ctypes.c_void_p(self.events[index]), True)
+        if result:
+            raise ctypes.WinError(result)
+
+    def wait(self, timeout=None):
+        millis = INFINITE if timeout is None else int(timeout * 1000)
+        result = self.kernel32.WaitForMultipleObjects(len(self.handles), self.handles, False, millis)
+        if result == WAIT_TIMEOUT:
+            return TIMEOUT
+        index = result - WAIT_OBJECT_0
+        if index >= len(self.keys):
+            return STOPPED
+        self._arm(index)  # notifications are one-shot
+        return CHANGED
+
+    def stop(self):
+        self.kernel32.SetEvent(self.stop_event)
+
+    def close(self):
+        for key in self.keys:
+            key.Close()
+        for handle in self.events + [self.stop_event]:
+            self.kernel32.CloseHandle(handle)
+
+
+class FakeNotifier:
+    # Event-driven counterpart for FakeRegistryBackend: waits on the
+    # backend's condition, so tests need no sleeps or polling
+    def __init__(self, backend, paths, hive=HKEY_CURRENT_USER):
+        self.backend = backend
+        self.watched = [(hive, path.lower()) for path in paths]
+        self.stopped = False
+        self.seen = self._versions()
+
+    def _versions(self):
+        return [self.backend.key_versions.get(key, 0) for key in self.watched]
+
+    def wait(self, timeout=None):
+        with self.backend.changed:
+            fired = self.backend.changed.wait_for(lambda: self.stopped or self._versions() != self.seen, timeout)
+            if self.stopped:
+                return STOPPED
+            if not fired:
+                return TIMEOUT
+            self.seen = self._versions()
+            return CHANGED
+
+    def stop(self):
+        with self.backend.changed:
+            self.stopped = True
+            self.backend.changed.notify_all()
+
+    def close(self):
+        pass
+
+
+# --- Watcher ---
+
+class ThemeWatcher:
+    # Reports external theme changes as snapshot diffs. After the first
+    # notification it keeps absorbing changes until the keys have been quiet
+    # for `debounce` seconds, then reads the values once. on_change(changes,
+    # current) runs on the watcher thread with the diff and the full snapshot.
+    def __init__(self, on_change, notifier=None, backend=None, hive=HKEY_CURRENT_USER, debounce=0.3):
+        self.on_change = on_change
+        self.backend = backend
+        self.hive = hive
+        self.debounce = debounce
+        paths = sorted({path for path, _ in THEME_VALUES})
+        self.notifier = notifier or WinregNotifier(paths, hive)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.expected = {}  # {(path, name): entry} the app is about to write
+        self.last = None  # snapshot the next diff is taken against
+        self.ready = threading.Event()  # set once that first snapshot is read
+
+    def expect(self, values):
+        # Called before the app's own writes. A change that lands on exactly
+        # the expected entry is not reported; anything else still is. Entries
+        # that already match the last snapshot are skipped: RegistryBatch
+        # never rewrites them, so no change would ever use them up.
+        with self.lock:
+            self.expected.update((key, entry) for key, entry in values.items()
+                                 if self.last is None or self.last.get(key) != entry)
+
+    def forget(self, values):
+        # For an apply that failed or was cancelled: its writes were rolled
+        # back, so drop what it expected
+        with self.lock:
+            for key, entry in values.items():
+                if key in self.expected and self.expected[key] == entry:
+                    del self.expected[key]
+
+    def _drop_expected(self, changes):
+        with self.lock:
+            own = [key for key, (_, entry) in changes.items()
+                   if key in self.expected and self.expected[key] == entry]
+            for key in own:
+                del self.expected[key]
+        return {key: change for key, change in changes.items() if key not in own}
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="theme-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.notifier.stop()
+        if self.thread is not None:
+            self.thread.join()
+        self.notifier.close()
+
+    def _run(self):
+        backend = self.backend or default_backend()
+        with self.lock:
+            self.last = take_snapshot(backend, self.hive)
+        self.ready.set()
+        while self.notifier.wait() == CHANGED:
+            while True:
+                state = self.notifier.wait(self.debounce)
+                if state != CHANGED:
+                    break
+            if state == STOPPED:
+                return
+
+            current = take_snapshot(backend, self.hive)
+            with self.lock:
+                last, self.last = self.last, current
+            changes = self._drop_expected(diff(last, current))
+            if changes:
+                try:
+                    self.on_change(changes, current)
+                except Exception as e:
+                    print("Theme watcher callback failed:", e)